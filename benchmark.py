@@ -0,0 +1,430 @@
+"""Benchmark suite for the containers in data_structures.
+
+Runs insert / lookup / miss / delete / iterate workloads over a grid of
+sizes, key orders and hash functions, with the built-in dict as the
+baseline, and writes the timings as JSON so runs from different commits
+can be compared:
+
+    python benchmark.py --sizes 1000,100000 --output before.json
+    python benchmark.py --sizes 1000,100000 --compare before.json
+"""
+import argparse
+import collections
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+from data_structures import (BinarySearchTreeDict, BTreeDict,
+                             ChainedHashDict, CuckooHashDict,
+                             DoublyLinkedList, IntOpenAddressHashDict,
+                             OpenAddressHashDict, PersistentTreeDict,
+                             SinglyLinkedList, SkipListDict, numpy,
+                             siphash, terrible_hash, universal_hash)
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
+ORDERS = ("random", "sorted", "adversarial")
+HASHES = {
+    "good": lambda: hash,
+    "terrible": lambda: terrible_hash(5),
+    "universal": lambda: universal_hash(0),
+    "siphash": lambda: siphash(0),
+}
+# linear scans of a SinglyLinkedList are sampled rather than run n times
+LIST_LOOKUPS = 1000
+
+
+def make_keys(n, order, seed):
+    """
+    :param n:
+     the number of distinct integer keys
+    :param order:
+    random, sorted, or adversarial (keys sharing their low 16 bits, \
+    inserted in zig-zag order)
+    :param seed:
+    the seed for the random order
+    :return:
+    returns the list of keys
+    """
+    if order == "sorted":
+        return list(range(n))
+    if order == "random":
+        keys = list(range(n))
+        random.Random(seed).shuffle(keys)
+        return keys
+    keys = []
+    lo, hi = 0, n - 1
+    while lo <= hi:
+        keys.append(lo << 16)
+        if lo != hi:
+            keys.append(hi << 16)
+        lo += 1
+        hi -= 1
+    return keys
+
+
+def _timed(func):
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = timeit.default_timer()
+        func()
+        return timeit.default_timer() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+class DictAdapter(object):
+    """Workloads for a mapping: the built-in dict or one of the dicts."""
+
+    def __init__(self, name, factory, quadratic=False):
+        self.name = name
+        self.factory = factory
+        self.quadratic = quadratic
+
+    def run(self, keys, lookups):
+        table = self.factory()
+        rows = []
+
+        def insert():
+            for k in keys:
+                table[k] = k
+
+        rows.append(("insert", len(keys), _timed(insert)))
+        usage = table.memory_usage() if hasattr(table, "memory_usage") \
+            else None
+
+        def lookup():
+            for k in lookups:
+                table[k]
+
+        rows.append(("lookup", len(lookups), _timed(lookup)))
+        # keys are non-negative, so their negations minus one all miss
+        contains = table.__contains__ if isinstance(table, dict) \
+            else getattr(table, "contains", None)
+        if contains is not None:
+            misses = [-1 - k for k in lookups]
+
+            def miss():
+                for k in misses:
+                    contains(k)
+
+            rows.append(("miss", len(misses), _timed(miss)))
+
+        def iterate():
+            for k in table:
+                pass
+
+        rows.append(("iterate", len(keys), _timed(iterate)))
+
+        def delete():
+            for k in lookups:
+                del table[k]
+
+        rows.append(("delete", len(lookups), _timed(delete)))
+        return rows, usage
+
+
+class ListAdapter(object):
+    """Workloads for SinglyLinkedList used as a FIFO queue."""
+
+    name = "SinglyLinkedList"
+    quadratic = False
+
+    def run(self, keys, lookups):
+        linked = SinglyLinkedList()
+        rows = []
+
+        def insert():
+            for k in keys:
+                linked.append(k)
+
+        rows.append(("insert", len(keys), _timed(insert)))
+        usage = linked.memory_usage()
+        sample = lookups[:LIST_LOOKUPS]
+
+        def lookup():
+            for k in sample:
+                k in linked
+
+        rows.append(("lookup", len(sample), _timed(lookup)))
+
+        def iterate():
+            for item in linked:
+                pass
+
+        rows.append(("iterate", len(keys), _timed(iterate)))
+
+        def delete():
+            for i in range(len(keys)):
+                linked.popleft()
+
+        rows.append(("delete", len(keys), _timed(delete)))
+        return rows, usage
+
+
+class QueueAdapter(object):
+    """Job-queue workloads for collections.deque or DoublyLinkedList."""
+
+    quadratic = False
+
+    def __init__(self, name, factory, remove):
+        """
+        :param remove:
+         a function of (queue, handle, item) removing a queued item, \
+         where handle is what append returned for it
+        """
+        self.name = name
+        self.factory = factory
+        self.remove = remove
+
+    def run(self, keys, lookups):
+        queue = self.factory()
+        handles = {}
+        rows = []
+
+        def insert():
+            for k in keys:
+                handles[k] = queue.append(k)
+
+        rows.append(("insert", len(keys), _timed(insert)))
+        usage = queue.memory_usage() if hasattr(queue, "memory_usage") \
+            else None
+        sample = lookups[:LIST_LOOKUPS]
+
+        def remove():
+            for k in sample:
+                self.remove(queue, handles[k], k)
+
+        rows.append(("remove", len(sample), _timed(remove)))
+
+        def requeue():
+            for i in range(len(queue)):
+                queue.append(queue.popleft())
+
+        rows.append(("requeue", len(queue), _timed(requeue)))
+
+        def iterate():
+            for item in queue:
+                pass
+
+        rows.append(("iterate", len(queue), _timed(iterate)))
+        count = len(queue)
+
+        def delete():
+            for i in range(count):
+                queue.pop()
+
+        rows.append(("delete", count, _timed(delete)))
+        return rows, usage
+
+
+class BatchAdapter(object):
+    """Workloads for IntOpenAddressHashDict through its batch API."""
+
+    name = "IntOpenAddressHashDict(batch)"
+    quadratic = False
+
+    def run(self, keys, lookups):
+        table = IntOpenAddressHashDict()
+        key_array = numpy.asarray(keys, dtype=numpy.int64)
+        lookup_array = numpy.asarray(lookups, dtype=numpy.int64)
+        rows = []
+        rows.append(("insert", len(keys),
+                     _timed(lambda: table.set_many(key_array, key_array))))
+        usage = table.memory_usage()
+        rows.append(("lookup", len(lookups),
+                     _timed(lambda: table.get_many(lookup_array))))
+
+        def iterate():
+            for k in table:
+                pass
+
+        rows.append(("iterate", len(keys), _timed(iterate)))
+
+        def delete():
+            for k in lookups:
+                del table[k]
+
+        rows.append(("delete", len(lookups), _timed(delete)))
+        return rows, usage
+
+
+def adapters(hash_name, order, seed=0):
+    """
+    :param hash_name:
+     the key of HASHES used by the hash tables
+    :param order:
+    the key order, used to flag workloads that go quadratic
+    :param seed:
+    the seed of randomized containers
+    :return:
+    returns the adapters to run for this hash function and key order
+    """
+    hashfunc = HASHES[hash_name]
+    degenerate = hash_name == "terrible"
+    result = [
+        DictAdapter("ChainedHashDict",
+                    lambda: ChainedHashDict(hashfunc=hashfunc()),
+                    degenerate),
+        DictAdapter("ChainedHashDict(incremental)",
+                    lambda: ChainedHashDict(hashfunc=hashfunc(),
+                                            incremental=True),
+                    degenerate),
+        DictAdapter("OpenAddressHashDict",
+                    lambda: OpenAddressHashDict(hashfunc=hashfunc()),
+                    degenerate),
+        DictAdapter("OpenAddressHashDict(robin_hood)",
+                    lambda: OpenAddressHashDict(hashfunc=hashfunc(),
+                                                robin_hood=True),
+                    degenerate),
+        DictAdapter("ChainedHashDict(bloom)",
+                    lambda: ChainedHashDict(hashfunc=hashfunc(), bloom=True),
+                    degenerate),
+        DictAdapter("OpenAddressHashDict(bloom)",
+                    lambda: OpenAddressHashDict(hashfunc=hashfunc(),
+                                                bloom=True),
+                    degenerate),
+        DictAdapter("ChainedHashDict(mask)",
+                    lambda: ChainedHashDict(hashfunc=hashfunc(),
+                                            reduce="mask"),
+                    degenerate or (hash_name == "good" and
+                                   order == "adversarial")),
+        DictAdapter("CuckooHashDict",
+                    lambda: CuckooHashDict(hashfunc=hashfunc()),
+                    hash_name == "terrible"),
+    ]
+    if hash_name == "good":
+        result += [
+            DictAdapter("dict", dict),
+            DictAdapter("BinarySearchTreeDict", BinarySearchTreeDict,
+                        order != "random"),
+            DictAdapter("BinarySearchTreeDict(balanced)",
+                        lambda: BinarySearchTreeDict(balanced=True)),
+            DictAdapter("BTreeDict", BTreeDict),
+            DictAdapter("PersistentTreeDict", PersistentTreeDict),
+            DictAdapter("SkipListDict", lambda: SkipListDict(seed=seed)),
+            ListAdapter(),
+            QueueAdapter("deque", collections.deque,
+                         lambda queue, handle, item: queue.remove(item)),
+            QueueAdapter("DoublyLinkedList", DoublyLinkedList,
+                         lambda queue, handle, item:
+                         queue.remove_node(handle)),
+        ]
+        if numpy is not None:
+            result.append(BatchAdapter())
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"]).strip().decode("ascii")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, orders, hash_names, seed, slow_limit, log=sys.stdout):
+    results = []
+    for size in sizes:
+        for order in orders:
+            keys = make_keys(size, order, seed)
+            lookups = list(keys)
+            random.Random(seed + 1).shuffle(lookups)
+            for hash_name in hash_names:
+                for adapter in adapters(hash_name, order, seed):
+                    row = {"container": adapter.name, "hash": hash_name,
+                           "order": order, "size": size}
+                    if adapter.quadratic and size > slow_limit:
+                        row["skipped"] = "quadratic above --slow-limit"
+                        results.append(row)
+                        continue
+                    rows, usage = adapter.run(keys, lookups)
+                    for workload, ops, seconds in rows:
+                        entry = dict(row, workload=workload, ops=ops,
+                                     seconds=seconds,
+                                     ns_per_op=seconds * 1e9 / max(ops, 1))
+                        if usage and workload == "insert":
+                            entry["bytes_per_entry"] = \
+                                usage["bytes_per_entry"]
+                        results.append(entry)
+                        log.write("%-32s %-8s %-11s %9d %-7s %10.1f ns/op\n"
+                                  % (adapter.name, hash_name, order, size,
+                                     workload, entry["ns_per_op"]))
+                        log.flush()
+    return results
+
+
+def _row_key(row):
+    return (row["container"], row["hash"], row["order"], row["size"],
+            row.get("workload"))
+
+
+def compare(old_results, new_results, log=sys.stdout):
+    """
+    :param old_results:
+     the results list of an earlier run
+    :param new_results:
+    the results list of this run
+    :return:
+    prints the new/old ns_per_op ratio of every row present in both
+    """
+    old = dict((_row_key(r), r) for r in old_results if "ns_per_op" in r)
+    for row in new_results:
+        before = old.get(_row_key(row))
+        if before is None or "ns_per_op" not in row:
+            continue
+        ratio = row["ns_per_op"] / max(before["ns_per_op"], 1e-9)
+        log.write("%-32s %-8s %-11s %9d %-7s %6.2fx\n"
+                  % (_row_key(row) + (ratio,)))
+
+
+def _int_list(text):
+    return [int(float(part)) for part in text.split(",") if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=_int_list, default=list(SIZES),
+                        help="comma-separated key counts, e.g. 1e3,1e5")
+    parser.add_argument("--orders", default=",".join(ORDERS),
+                        help="comma-separated subset of %s"
+                        % ",".join(ORDERS))
+    parser.add_argument("--hashes", default=",".join(sorted(HASHES)),
+                        help="comma-separated subset of %s"
+                        % ",".join(sorted(HASHES)))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--slow-limit", type=int, default=10 ** 4,
+                        help="skip degenerate (quadratic) runs above "
+                        "this size")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", metavar="OLD_JSON",
+                        help="print ratios against an earlier output file")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.orders.split(","),
+                  args.hashes.split(","), args.seed, args.slow_limit)
+    report = {
+        "meta": {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "revision": git_revision(),
+            "seed": args.seed,
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f)["results"], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,89 +1,204 @@
-class SinglyLinkedNode(object):
-    def __init__(self, item=None, next_link=None):
-        super(SinglyLinkedNode, self).__init__()
-        self._item = item
-        self._next = next_link
+import math
+import mmap
+import multiprocessing
+import random
+import struct
+import sys
+import threading
+import time
+from bisect import bisect_left
+from timeit import default_timer
 
-    @property
-    def item(self):
-        return self._item
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 
-    @item.setter
-    def item(self, item):
-        self._item = item
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-    @property
-    def next(self):
-        return self._next
+# Set to False before creating tables to leave out the resize counters
+# behind the hash tables' stats(); tables can also opt out one by one.
+COLLECT_STATS = True
+
+
+class SinglyLinkedNode(object):
+    __slots__ = ('item', 'next')
 
-    @next.setter
-    def next(self, next):
-        self._next = next
+    def __init__(self, item=None, next_link=None):
+        super(SinglyLinkedNode, self).__init__()
+        self.item = item
+        self.next = next_link
 
     def __repr__(self):
         return repr(self.item)
 
 
 class DoublyLinkedNode(object):
+    __slots__ = ('key', 'value', 'next', 'prev')
+
     def __init__(self, key=None, value=None, next_link=None, prev_link=None):
         super(DoublyLinkedNode, self).__init__()
-        self._key = key
-        self._value = value
-        self._next = next_link
-        self._prev = prev_link
+        self.key = key
+        self.value = value
+        self.next = next_link
+        self.prev = prev_link
 
-    @property
-    def key(self):
-        return self._key
+    def __repr__(self):
+        return repr(self.key)
 
-    @key.setter
-    def item(self, key):
-        self._key = key
 
-    @property
-    def value(self):
-        return self._value
+def _memory_report(container_bytes, node_count, node_bytes, entries):
+    """
+    :param container_bytes:
+     bytes held by the container object and its internal arrays
+    :param node_count:
+    the number of nodes allocated by the container
+    :param node_bytes:
+    the size of one node
+    :param entries:
+    the number of key-value pairs or items stored
+    :return:
+    returns a dict describing the structural memory of a container; \
+    the keys and values themselves are not counted
+    """
+    total = container_bytes + node_count * node_bytes
+    return {
+        "entries": entries,
+        "nodes": node_count,
+        "bytes": total,
+        "bytes_per_entry": total / float(entries) if entries else 0.0,
+    }
 
-    @value.setter
-    def value(self, value):
-        self._value = value
 
-    @property
-    def next(self):
-        return self._next
+def _as_pairs(items):
+    """
+    :param items:
+     a mapping or an iterable of key-value pairs
+    :return:
+    returns the key-value pairs as a sized sequence
+    """
+    if hasattr(items, 'iteritems'):
+        items = items.iteritems()
+    if not hasattr(items, '__len__'):
+        items = list(items)
+    return items
 
-    @next.setter
-    def next(self, next):
-        self._next = next
 
-    @property
-    def prev(self):
-        return self._prev
+def _display_rows(count, limit, sample):
+    """
+    :param count:
+     the number of rows a display can show
+    :param limit:
+    the most rows to show, or None for all
+    :param sample:
+    show only every sample-th row, or None for all
+    :return:
+    returns the indices of the rows to show, lazily
+    """
+    step = sample or 1
+    stop = count if limit is None else min(count, limit * step)
+    return xrange(0, stop, step)
 
-    @prev.setter
-    def prev(self, prev):
-        self._prev = prev
 
-    def __repr__(self):
-        return repr(self.key)
+def _write_lines(fileobj, lines, batch_size=4096):
+    """
+    :param fileobj:
+     any object with a write method
+    :param lines:
+    an iterable of strings
+    :param batch_size:
+    the number of lines joined into one write
+    :return:
+    writes the lines, holding at most batch_size of them in memory
+    """
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == batch_size:
+            fileobj.write("".join(batch))
+            batch = []
+    if batch:
+        fileobj.write("".join(batch))
+
+
+def _stats_report(table, histogram, tombstones):
+    """
+    :param table:
+     the hash table being reported on
+    :param histogram:
+    maps a probe or chain length to how often it occurs
+    :param tombstones:
+    the number of slots holding a deleted marker
+    :return:
+    returns the dict shared by the stats() of both hash tables
+    """
+    return {
+        "entries": len(table),
+        "bins": table._bin_count,
+        "load_factor": table.load_factor,
+        "tombstones": tombstones,
+        "resizes": table._resizes if table.track_stats else None,
+        "resize_seconds":
+            table._resize_seconds if table.track_stats else None,
+        "histogram": histogram,
+    }
+
+
+_HASH_MASK = (1 << 64) - 1
+# 2**64 / golden ratio, the multiplier of Fibonacci hashing
+_GOLDEN = 0x9E3779B97F4A7C15
+# the ways a hash table can reduce a 64-bit hash to one of its bins;
+# the tables default to "fibonacci", whose extra multiply costs about
+# a microsecond per operation, because "mask" puts every key that
+# shares its low bits (e.g. multiples of a power of two) in one bin
+REDUCTIONS = ("mask", "fibonacci")
+
+
+def _next_power_of_two(n):
+    capacity = 1
+    while capacity < n:
+        capacity <<= 1
+    return capacity
+
+
+def _bin_reducer(reduce, bin_count):
+    """
+    :param reduce:
+     "mask" keeps the low bits of the hash, "fibonacci" keeps the top \
+     bits of the hash times 2**64 / golden ratio, which also spreads \
+     keys that only differ in their high bits; "mask" is a little \
+     faster but clusters such keys into a few bins
+    :param bin_count:
+    the number of bins, a power of two
+    :return:
+    returns a function mapping any integer hash to a bin index
+    """
+    if reduce == "mask":
+        mask = bin_count - 1
+        return lambda hash_code: hash_code & mask
+    if reduce == "fibonacci":
+        shift = 64 - (bin_count.bit_length() - 1)
+        return lambda hash_code: \
+            ((hash_code * _GOLDEN) & _HASH_MASK) >> shift
+    raise ValueError("Unknown reduction: %r" % (reduce,))
 
 
 class SinglyLinkedList(object):
     def __init__(self):
         super(SinglyLinkedList, self).__init__()
         self.head = None
+        self.tail = None
+        self._size = 0
 
     def __len__(self):
         """
         :return:
         returns the length of the linked list
         """
-        current = self.head
-        count = 0
-        while current:
-            count += 1
-            current = current.next
-        return count
+        return self._size
 
     def __iter__(self):
         current = self.head
@@ -91,23 +206,47 @@ class SinglyLinkedList(object):
             yield str(current.item)
             current = current.next
 
+    def iteritems(self):
+        """
+        :return:
+        lazily yields the items from head to tail
+        """
+        current = self.head
+        while current is not None:
+            yield current.item
+            current = current.next
+
+    def __reduce__(self):
+        return SinglyLinkedList, (), None, self.iteritems()
+
     def __contains__(self, item):
         """
         :param item:
          check if item is present in the linked list
         :return:
-        returns True if item is present otherwise returns False
+        returns True if item is present otherwise raise exception
         """
         current = self.head
-        found = False
-        while current and found is False:
+        while current is not None:
             if current.item == item:
-                found = True
-            else:
-                current = current.next
-        if current is None:
-            raise ValueError("Item not found")
-        return found
+                return True
+            current = current.next
+        raise ValueError("Item not found")
+
+    def contains(self, item):
+        """
+        :param item:
+         check if item is present in the linked list
+        :return:
+        returns True if item is present and False otherwise, \
+        without raising on a miss
+        """
+        current = self.head
+        while current is not None:
+            if current.item == item:
+                return True
+            current = current.next
+        return False
 
     def remove(self, item):
         """
@@ -119,22 +258,19 @@ class SinglyLinkedList(object):
         """
         current = self.head
         previous = None
-        found = False
-        while current and found is False:
+        while current is not None:
             if current.item == item:
-                found = True
-            else:
-                previous = current
-                current = current.next
-        if current is None:
-            return False
-        if previous is None:
-            self.head = current.next
-            found = True
-        else:
-            previous.next = current.next
-            found = True
-        return found
+                if previous is None:
+                    self.head = current.next
+                else:
+                    previous.next = current.next
+                if current is self.tail:
+                    self.tail = previous
+                self._size -= 1
+                return True
+            previous = current
+            current = current.next
+        return False
 
     def prepend(self, item):
         """
@@ -144,325 +280,3991 @@ class SinglyLinkedList(object):
         """
         new_node = SinglyLinkedNode(item, self.head)
         self.head = new_node
+        if self.tail is None:
+            self.tail = new_node
+        self._size += 1
+
+    def append(self, item):
+        """
+        :param item:
+        add the item at the tail of the linked list
+        :return:
+        """
+        new_node = SinglyLinkedNode(item, None)
+        if self.tail is None:
+            self.head = new_node
+        else:
+            self.tail.next = new_node
+        self.tail = new_node
+        self._size += 1
+
+    def popleft(self):
+        """
+        :return:
+        removes and returns the item at the head of the linked list, \
+        raise exception if the list is empty
+        """
+        node = self.head
+        if node is None:
+            raise ValueError("List is empty")
+        self.head = node.next
+        if self.head is None:
+            self.tail = None
+        self._size -= 1
+        return node.item
+
+    def extend(self, iterable):
+        """
+        :param iterable:
+         the items to add at the tail of the linked list, in order
+        :return:
+        """
+        first = last = None
+        count = 0
+        for item in iterable:
+            new_node = SinglyLinkedNode(item, None)
+            if last is None:
+                first = new_node
+            else:
+                last.next = new_node
+            last = new_node
+            count += 1
+        if first is None:
+            return
+        if self.tail is None:
+            self.head = first
+        else:
+            self.tail.next = first
+        self.tail = last
+        self._size += count
 
     def __repr__(self):
         s = "List:" + "->".join([item for item in self])
         return s
 
+    def memory_usage(self):
+        """
+        :return:
+        returns the structural memory report of the linked list
+        """
+        return _memory_report(sys.getsizeof(self), self._size,
+                              sys.getsizeof(SinglyLinkedNode()), self._size)
 
-class ChainedHashDict(object):
-    def __init__(self, bin_count=10, max_load=0.7, hashfunc=hash):
-        super(ChainedHashDict, self).__init__()
 
-        self._bin_count = bin_count
-        self._max_load = max_load
-        self._load_factor = 0.0
-        self.hash_slot = [DoublyLinkedNode(None, None, None, None)
-                          for i in range(self._bin_count)]
-        self.hash_func = hashfunc
+class DoublyLinkedList(object):
+    def __init__(self, iterable=None):
+        """
+        :param iterable:
+         the items to start the list with, in order
+        """
+        super(DoublyLinkedList, self).__init__()
+        # sentinels: head.next is the first node and tail.prev the last
+        self.head = DoublyLinkedNode()
+        self.tail = DoublyLinkedNode()
+        self.head.next = self.tail
+        self.tail.prev = self.head
+        self._size = 0
+        if iterable is not None:
+            self.extend(iterable)
 
-    @property
-    def load_factor(self):
-        self._load_factor = self.__len__() / float(self._bin_count)
-        return self._load_factor
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        node = self.head.next
+        while node is not self.tail:
+            yield node.value
+            node = node.next
+
+    def __reversed__(self):
+        node = self.tail.prev
+        while node is not self.head:
+            yield node.value
+            node = node.prev
+
+    def _link_after(self, prev_node, node):
+        node.prev = prev_node
+        node.next = prev_node.next
+        prev_node.next.prev = node
+        prev_node.next = node
+
+    def _unlink(self, node):
+        node.prev.next = node.next
+        node.next.prev = node.prev
+
+    def append_node(self, node):
+        """
+        :param node:
+         a DoublyLinkedNode that is in no list
+        :return:
+        links node at the tail of the list and returns it
+        """
+        self._link_after(self.tail.prev, node)
+        self._size += 1
+        return node
+
+    def appendleft_node(self, node):
+        """
+        :param node:
+         a DoublyLinkedNode that is in no list
+        :return:
+        links node at the head of the list and returns it
+        """
+        self._link_after(self.head, node)
+        self._size += 1
+        return node
+
+    def append(self, item):
+        """
+        :param item:
+         the item to add at the tail of the list
+        :return:
+        returns the new node, which remove_node and move_to_front \
+        take back in O(1)
+        """
+        tail = self.tail
+        node = DoublyLinkedNode(None, item, tail, tail.prev)
+        tail.prev.next = node
+        tail.prev = node
+        self._size += 1
+        return node
+
+    def appendleft(self, item):
+        """
+        :param item:
+         the item to add at the head of the list
+        :return:
+        returns the new node
+        """
+        head = self.head
+        node = DoublyLinkedNode(None, item, head.next, head)
+        head.next.prev = node
+        head.next = node
+        self._size += 1
+        return node
+
+    def remove_node(self, node):
+        """
+        :param node:
+         a node of this list
+        :return:
+        unlinks node in O(1) and returns its item
+        """
+        self._unlink(node)
+        node.prev = node.next = None
+        self._size -= 1
+        return node.value
+
+    def popleft(self):
+        """
+        :return:
+        removes and returns the item at the head of the list, \
+        raise exception if the list is empty
+        """
+        if self._size == 0:
+            raise ValueError("List is empty")
+        node = self.head.next
+        self.head.next = node.next
+        node.next.prev = self.head
+        node.prev = node.next = None
+        self._size -= 1
+        return node.value
+
+    def pop(self):
+        """
+        :return:
+        removes and returns the item at the tail of the list, \
+        raise exception if the list is empty
+        """
+        if self._size == 0:
+            raise ValueError("List is empty")
+        node = self.tail.prev
+        self.tail.prev = node.prev
+        node.prev.next = self.tail
+        node.prev = node.next = None
+        self._size -= 1
+        return node.value
+
+    def first_node(self):
+        """
+        :return:
+        returns the node at the head of the list, or None if it is empty
+        """
+        return self.head.next if self._size else None
+
+    def last_node(self):
+        """
+        :return:
+        returns the node at the tail of the list, or None if it is empty
+        """
+        return self.tail.prev if self._size else None
+
+    def move_to_front(self, node):
+        """
+        :param node:
+         a node of this list
+        :return:
+        moves node to the head of the list in O(1)
+        """
+        self._unlink(node)
+        self._link_after(self.head, node)
+
+    def move_to_end(self, node):
+        """
+        :param node:
+         a node of this list
+        :return:
+        moves node to the tail of the list in O(1)
+        """
+        self._unlink(node)
+        self._link_after(self.tail.prev, node)
+
+    def extend(self, iterable):
+        """
+        :param iterable:
+         the items to add at the tail of the list, in order
+        :return:
+        """
+        last = self.tail.prev
+        count = 0
+        for item in iterable:
+            node = DoublyLinkedNode(None, item, None, last)
+            last.next = node
+            last = node
+            count += 1
+        last.next = self.tail
+        self.tail.prev = last
+        self._size += count
+
+    def splice(self, other, after=None):
+        """
+        :param other:
+         another DoublyLinkedList, left empty
+        :param after:
+        the node of this list to insert after, or None for the tail
+        :return:
+        moves every node of other into this list in O(1)
+        """
+        if other is self:
+            raise ValueError("Can not splice a list into itself")
+        if other._size == 0:
+            return
+        if after is None:
+            after = self.tail.prev
+        first = other.head.next
+        last = other.tail.prev
+        first.prev = after
+        last.next = after.next
+        after.next.prev = last
+        after.next = first
+        self._size += other._size
+        other.head.next = other.tail
+        other.tail.prev = other.head
+        other._size = 0
+
+    def __repr__(self):
+        s = "List:" + "<->".join([str(item) for item in self])
+        return s
+
+    def memory_usage(self):
+        """
+        :return:
+        returns the structural memory report of the linked list, \
+        counting both sentinels
+        """
+        return _memory_report(sys.getsizeof(self), self._size + 2,
+                              sys.getsizeof(DoublyLinkedNode()), self._size)
+
+
+class SkipListNode(SinglyLinkedNode):
+    # item is the key and next is the tower of forward pointers,
+    # next[0] being the plain singly linked list of every node
+    __slots__ = ('value',)
+
+    def __init__(self, key=None, value=None, level=1):
+        super(SkipListNode, self).__init__(key, [None] * level)
+        self.value = value
 
     @property
-    def bin_count(self):
-        print self._bin_count
+    def key(self):
+        return self.item
 
-    def rebuild(self, bincount):
-        self.hash_slot += \
-            [DoublyLinkedNode(None, None, None, None) for i in range(bincount)]
+
+class SkipListDict(object):
+    MAX_LEVEL = 32
+
+    def __init__(self, seed=None):
+        """
+        :param seed:
+         seeds the tower heights, so equal seeds and equal operations \
+         give identical lists
+        """
+        super(SkipListDict, self).__init__()
+        self.head = SkipListNode(None, None, self.MAX_LEVEL)
+        self.level = 1
+        self.length = 0
+        self._rng = random.Random(seed)
+        # writers serialize on the lock; readers never take it
+        self._lock = threading.Lock()
+
+    def _random_level(self):
+        """
+        :return:
+        returns a tower height, each extra level having probability \
+        1/4, which halves the pointers per node against 1/2 for about \
+        the same number of steps per search
+        """
+        level = 1
+        bits = self._rng.getrandbits(2 * (self.MAX_LEVEL - 1))
+        while bits & 3 == 3:
+            level += 1
+            bits >>= 2
+        return level
+
+    def _search(self, key):
+        """
+        :param key:
+         the key to search for
+        :return:
+        returns the last node whose key is smaller than key (or the \
+        head) and the bottom-level successor the walk saw after it, \
+        which a reader must use instead of reading the pointer again \
+        since a writer may have linked a new node in between
+        """
+        node = self.head
+        # the first node found with a key >= key ends the walk on every
+        # level below, without comparing keys again; a concurrent delete
+        # may already have unlinked it there, so the end of the level
+        # must still be checked
+        stop = None
+        for i in range(self.level - 1, -1, -1):
+            nxt = node.next[i]
+            while nxt is not None and nxt is not stop and nxt.item < key:
+                node = nxt
+                nxt = node.next[i]
+            stop = nxt
+        return node, stop
+
+    def _predecessors(self, key):
+        """
+        :param key:
+         the key to search for
+        :return:
+        returns, for every level in use, the last node on that level \
+        whose key is smaller than key
+        """
+        update = [None] * self.level
+        node = self.head
+        stop = None
+        for i in range(self.level - 1, -1, -1):
+            nxt = node.next[i]
+            while nxt is not stop and nxt.item < key:
+                node = nxt
+                nxt = node.next[i]
+            stop = nxt
+            update[i] = node
+        return update
+
+    def find_node(self, key):
+        """
+        :param key:
+         the key to look for
+        :return:
+        returns the node holding key, or None if it is missing
+        """
+        node = self._search(key)[1]
+        if node is not None and node.item == key:
+            return node
+        return None
 
     def __getitem__(self, key):
         """
         :param key:
-        the key whose value is to be found
+         the key whose value is to be found
         :return:
-        if the key is found it returns the \
-        value associated with the key  otherwise raise exception
+        returns the value associated with the key otherwise raise exception
         """
-        hash_value = self.hash_func(key)
-        temp = self.hash_slot[hash_value]
-        tvalue = None
-        while temp and temp.key != key:
-            temp = temp.next
-        if temp and temp.key == key:
-            tvalue = temp.value
-        if tvalue:
-            return tvalue
-        else:
+        node = self.find_node(key)
+        if node is None:
             raise ValueError("Value not found")
+        return node.value
 
     def __setitem__(self, key, value):
         """
         :param key:
-        find the slot in hash table based on the key \
-        and add the value associated with the key
+         the key to be inserted
         :param value:
-        the value to be inserted for the key
+        the value associated with the key
         :return:
         """
-        if self._load_factor == self._max_load:
-            self.rebuild(10)
-            self._bin_count += 10
-        hash_value = self.hash_func(key)
-        new_node = DoublyLinkedNode(key, value, None, None)
-        if self.hash_slot[hash_value].key is None:
-            self.hash_slot[hash_value] = new_node
-        else:
-            temp = self.hash_slot[hash_value]
-            self.hash_slot[hash_value] = new_node
-            new_node.next = temp
-            temp.prev = new_node
+        with self._lock:
+            update = self._predecessors(key)
+            node = update[0].next[0]
+            if node is not None and node.item == key:
+                node.value = value
+                return
+            level = self._random_level()
+            if level > self.level:
+                update.extend([self.head] * (level - self.level))
+                self.level = level
+            node = SkipListNode(key, value, level)
+            # link bottom-up: a reader can only reach the node on a level
+            # once it is reachable on every level below
+            for i in range(level):
+                node.next[i] = update[i].next[i]
+                update[i].next[i] = node
+            self.length += 1
 
     def __delitem__(self, key):
         """
         :param key:
-         delete the key-value pair from the hash table
+         the key-value pair that has to be deleted
         :return:
-        raise exception if key was not found for deletion
+        deletes the key-value pair if found otherwise raise exception
         """
-        hash_value = self.hash_func(key)
-        temp = self.hash_slot[hash_value]
-        while temp and temp.key != key:
-            temp = temp.next
-        if not temp:
-            raise ValueError("Value not found")
-        if temp == self.hash_slot[hash_value] and not temp.next:
-            self.hash_slot[hash_value] = \
-                DoublyLinkedNode(None, None, None, None)
-        elif temp == self.hash_slot[hash_value] and temp.next:
-            self.hash_slot[hash_value] = temp.next
-        elif temp.key == key and temp.next:
-            temp.prev.next = temp.next
-            temp.next.prev = temp.prev
-        elif temp.key == key:
-            temp.prev.next = temp.next
+        with self._lock:
+            update = self._predecessors(key)
+            node = update[0].next[0]
+            if node is None or node.item != key:
+                raise ValueError("Value not found")
+            # unlink top-down, leaving the node's own pointers intact for
+            # a reader standing on it
+            for i in range(len(node.next) - 1, -1, -1):
+                update[i].next[i] = node.next[i]
+            while self.level > 1 and self.head.next[self.level - 1] is None:
+                self.level -= 1
+            self.length -= 1
 
     def __contains__(self, key):
         """
         :param key:
-         check whether the hash table contains key
+         the key which has to be checked in the skip list
         :return:
-        return True if the has table contains key else raise exception
+        return True if the key is present otherwise raise exception
         """
-        hash_value = self.hash_func(key)
-        temp = self.hash_slot[hash_value]
-        found = False
-        while temp and temp.key != key:
-            temp = temp.next
-        if temp and temp.key == key:
-            found = True
-        if found:
-            return found
+        if self.find_node(key) is not None:
+            return True
         else:
             raise ValueError("Value not found")
 
     def __len__(self):
         """
         :return:
-        length of the hashtable
+        returns the number of keys in the skip list
         """
-        count = 0
-        for i in range(len(self.hash_slot)):
-            temp = self.hash_slot[i]
-            while temp is not None:
-                count += 1
-                temp = temp.next
-        return count
+        return self.length
 
-    def display(self):
+    def __iter__(self):
+        node = self.head.next[0]
+        while node is not None:
+            yield node.item
+            node = node.next[0]
+
+    def iteritems(self):
         """
         :return:
-        return all the key-value pair as a string
+        lazily yields the key-value pairs in key order
         """
-        s = ""
-        for i in range(len(self.hash_slot)):
-            if self.hash_slot[i] is not None:
-                temp = self.hash_slot[i]
-                # print i, ":",
-                s += str(i) + ":"
-                while temp:
-                    s = s + "(" + str(temp.key) + "," + str(temp.value) + ")->"
-                    # print "(", temp.key, ",", temp.value, ")->",
-                    temp = temp.next
-                s += "NULL\n"
-                i += 1
+        return self.range()
+
+    def items(self):
+        """
+        :return:
+        returns the key-value pairs in key order
+        """
+        return [n for n in self.range()]
+
+    def range(self, lo=None, hi=None):
+        """
+        :param lo:
+         the smallest key to yield, or None for no lower bound
+        :param hi:
+        the key to stop before, or None for no upper bound
+        :return:
+        lazily yields the key-value pairs with lo <= key < hi, walking \
+        the bottom level once the start is found
+        """
+        node = self.head.next[0] if lo is None else self._search(lo)[1]
+        while node is not None and (hi is None or node.item < hi):
+            yield [node.item, node.value]
+            node = node.next[0]
+
+    def floor(self, key):
+        """
+        :param key:
+         the key to bound from above
+        :return:
+        return the largest key <= key, or None
+        """
+        node, nxt = self._search(key)
+        if nxt is not None and nxt.item == key:
+            return key
+        return None if node is self.head else node.item
+
+    def ceiling(self, key):
+        """
+        :param key:
+         the key to bound from below
+        :return:
+        return the smallest key >= key, or None
+        """
+        node = self._search(key)[1]
+        return None if node is None else node.item
+
+    def __repr__(self):
+        s = "SkipList:" + "->".join([str(key) for key in self])
         return s
 
+    def memory_usage(self):
+        """
+        :return:
+        returns the structural memory report of the skip list, \
+        counting the tower of forward pointers of every node
+        """
+        tower_bytes = sys.getsizeof(self.head.next)
+        node = self.head.next[0]
+        while node is not None:
+            tower_bytes += sys.getsizeof(node.next)
+            node = node.next[0]
+        return _memory_report(sys.getsizeof(self) + tower_bytes,
+                              self.length + 1,
+                              sys.getsizeof(SkipListNode()), self.length)
 
-class OpenAddressHashDict(object):
-    def __init__(self, bin_count=10, max_load=0.7, hashfunc=hash):
-        super(OpenAddressHashDict, self).__init__()
 
-        self._bin_count = bin_count
-        self.max_load = max_load
-        self.__load_factor = 0
-        self.i = 1
-        self.hash_slot = [None for i in range(self._bin_count)]
-        self.hash_value = [None for i in range(self._bin_count)]
+class BloomFilter(object):
+    def __init__(self, capacity=1024, error_rate=0.01):
+        """
+        :param capacity:
+         the number of items the filter is sized for
+        :param error_rate:
+        the false-positive rate once capacity items have been added
+        """
+        super(BloomFilter, self).__init__()
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        bits = -self.capacity * math.log(error_rate) / math.log(2) ** 2
+        self.bit_count = max(64, _next_power_of_two(int(bits)))
+        self.hash_count = max(1, int(round(-math.log(error_rate, 2))))
+        self.bits = bytearray(self.bit_count >> 3)
+        self._mask = self.bit_count - 1
+        # items added, and how many of those were removed since from
+        # the set the filter stands for
+        self.count = 0
+        self.stale = 0
+
+    def _probe(self, item):
+        """
+        :param item:
+         a hashable item
+        :return:
+        returns the first bit index and the odd stride of the \
+        hash_count bits of item, two 32-bit mixes of the built-in \
+        hash, each of which depends on all 64 bits of it
+        """
+        h = hash(item)
+        lo = h & 0xFFFFFFFF
+        hi = (h >> 32) & 0xFFFFFFFF
+        # multipliers below 2**31 keep every product a machine int
+        a = (lo ^ (hi * 0x5BD1E995)) & 0xFFFFFFFF
+        a = ((a ^ (a >> 16)) * 0x45D9F3B) & 0xFFFFFFFF
+        a = ((a ^ (a >> 16)) * 0x45D9F3B) & 0xFFFFFFFF
+        b = (hi ^ (lo * 0x2C1B3C6D)) & 0xFFFFFFFF
+        b = ((b ^ (b >> 15)) * 0x297A2D39) & 0xFFFFFFFF
+        return (a ^ (a >> 16)) & self._mask, (b ^ (b >> 15)) | 1
+
+    def add(self, item):
+        """
+        :param item:
+         the item to add
+        :return:
+        sets the bits of item
+        """
+        pos, stride = self._probe(item)
+        bits = self.bits
+        mask = self._mask
+        for i in xrange(self.hash_count):
+            bits[pos >> 3] |= 1 << (pos & 7)
+            pos = (pos + stride) & mask
+        self.count += 1
+
+    def __contains__(self, item):
+        """
+        :param item:
+         the item to check
+        :return:
+        returns False if item was never added, and True if it was \
+        or, with probability about error_rate, if it was not
+        """
+        # _probe inlined, testing the first bit before mixing the
+        # stride: most misses stop there
+        h = hash(item)
+        lo = h & 0xFFFFFFFF
+        hi = (h >> 32) & 0xFFFFFFFF
+        a = (lo ^ (hi * 0x5BD1E995)) & 0xFFFFFFFF
+        a = ((a ^ (a >> 16)) * 0x45D9F3B) & 0xFFFFFFFF
+        a = ((a ^ (a >> 16)) * 0x45D9F3B) & 0xFFFFFFFF
+        mask = self._mask
+        pos = (a ^ (a >> 16)) & mask
+        bits = self.bits
+        if not bits[pos >> 3] & (1 << (pos & 7)):
+            return False
+        b = (hi ^ (lo * 0x2C1B3C6D)) & 0xFFFFFFFF
+        b = ((b ^ (b >> 15)) * 0x297A2D39) & 0xFFFFFFFF
+        stride = (b ^ (b >> 15)) | 1
+        for i in xrange(self.hash_count - 1):
+            pos = (pos + stride) & mask
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def mark_removed(self):
+        """
+        :return:
+        records that an added item has left the set; its bits stay \
+        set, so the filter keeps answering True for it until rebuilt
+        """
+        self.stale += 1
+
+    @property
+    def needs_rebuild(self):
+        """
+        :return:
+        returns True once more items were added than the filter is \
+        sized for, or more of them are stale than live
+        """
+        return self.count > self.capacity or \
+            2 * self.stale > self.count
+
+
+def _empty_bins(count):
+    """
+    :param count:
+     the number of bins
+    :return:
+    returns a bin array whose bins all share one placeholder node, \
+    which _link replaces rather than fills, so a large table is \
+    allocated at list-multiplication speed
+    """
+    return [DoublyLinkedNode(None, None, None, None)] * count
+
+
+class ChainedHashDict(object):
+    def __init__(self, bin_count=10, max_load=0.7, hashfunc=hash,
+                 track_stats=None, reduce="fibonacci", incremental=False,
+                 migrate_step=4, bloom=False):
+        """
+        :param incremental:
+         grow by keeping the old and new bin arrays side by side and \
+         moving migrate_step old bins on every insert or delete, \
+         instead of rehashing the whole table in the insert that \
+         crosses max_load
+        :param migrate_step:
+        the number of old bins moved per write while growing
+        :param bloom:
+        keep a BloomFilter of the keys, checked before walking a \
+        chain, so most lookups of missing keys never touch the bins; \
+        keys must then also be hashable by the built-in hash; once \
+        more of its keys are deleted than live, the filter is rebuilt \
+        in one go, or with incremental migrate_step bins per write
+        """
+        super(ChainedHashDict, self).__init__()
+
+        self._bin_count = _next_power_of_two(bin_count)
+        self.reduce = reduce
+        self._home = _bin_reducer(reduce, self._bin_count)
+        self._max_load = max_load
+        self._load_factor = 0.0
+        self._size = 0
+        self.track_stats = COLLECT_STATS if track_stats is None \
+            else track_stats
+        self._resizes = 0
+        self._resize_seconds = 0.0
+        self.incremental = incremental
+        self.migrate_step = migrate_step
+        # while growing incrementally: the old bin array, its reducer
+        # and the number of old bins already moved to hash_slot
+        self._old_slot = None
+        self._old_home = None
+        self._migrated = 0
+        self.hash_slot = _empty_bins(self._bin_count)
         self.hash_func = hashfunc
+        # while growing incrementally the next filter, sized for the
+        # grown table, collects the keys as their bins are migrated;
+        # outside of growth it is an incremental rebuild of the filter,
+        # which has scanned the bins below _bloom_scanned
+        self._bloom = self._new_bloom() if bloom else None
+        self._next_bloom = None
+        self._bloom_scanned = 0
 
     @property
     def load_factor(self):
-        length_hash = self.__len__()
-        return length_hash / float(self._bin_count)
+        self._load_factor = self._size / float(self._bin_count)
+        return self._load_factor
 
     @property
     def bin_count(self):
         print self._bin_count
 
+    def _bin_index(self, key):
+        return self._home(self.hash_func(key))
+
+    def _locate(self, key):
+        """
+        :param key:
+         the key to look for
+        :return:
+        returns the bin array and bin index whose chain holds key, or \
+        would hold it: the old array while key's old bin has not been \
+        migrated yet, the current one otherwise
+        """
+        hash_code = self.hash_func(key)
+        if self._old_slot is not None:
+            index = self._old_home(hash_code)
+            if index >= self._migrated:
+                return self._old_slot, index
+        return self.hash_slot, self._home(hash_code)
+
+    def _chains(self):
+        """
+        :return:
+        yields the head of every bin holding entries or pending \
+        migration: the unmigrated old bins, then the current ones
+        """
+        if self._old_slot is not None:
+            for i in range(self._migrated, len(self._old_slot)):
+                yield self._old_slot[i]
+        for head in self.hash_slot:
+            yield head
+
+    def __reduce__(self):
+        # pickle the entries as a flat stream of pairs rather than the
+        # chain nodes, whose next links would pickle recursively; the
+        # table is rebuilt at its current bin count
+        return ChainedHashDict, \
+            (self._bin_count, self._max_load, self.hash_func,
+             self.track_stats, self.reduce, self.incremental,
+             self.migrate_step, self._bloom is not None), \
+            None, None, self.iteritems()
+
     def rebuild(self, bincount):
         """
-        :param bincount:
-         rebuild the hash by this amount
+        :param bincount:
+         the number of bins of the rebuilt table, \
+         rounded up to a power of two
+        :return:
+        moves every entry into a fresh table of bincount bins, \
+        relinking the existing nodes rather than copying them
+        """
+        if self.track_stats:
+            start = default_timer()
+        old_chains = list(self._chains())
+        self._old_slot = None
+        self._old_home = None
+        self._bin_count = _next_power_of_two(bincount)
+        self._home = _bin_reducer(self.reduce, self._bin_count)
+        self.hash_slot = _empty_bins(self._bin_count)
+        for temp in old_chains:
+            self._relink(temp)
+        if self._bloom is not None:
+            self._rebuild_bloom()
+        if self.track_stats:
+            self._resizes += 1
+            self._resize_seconds += default_timer() - start
+
+    def _new_bloom(self):
+        """
+        :return:
+        returns an empty BloomFilter sized for twice the entries the \
+        table holds before it grows, so deletes and re-inserts can \
+        add keys for a while before it has to be rebuilt
+        """
+        return BloomFilter(2 * self._max_load * self._bin_count + 1)
+
+    def _rebuild_bloom(self):
+        """
+        :return:
+        replaces the Bloom filter with one holding only the live keys
+        """
+        self._next_bloom = None
+        bloom = self._new_bloom()
+        for key in self:
+            bloom.add(key)
+        self._bloom = bloom
+
+    def _in_next_bloom(self, slots, index):
+        """
+        :param slots:
+         the bin array returned by _locate
+        :param index:
+        the bin index returned by _locate
+        :return:
+        returns True if the next filter already covers that bin: it \
+        has been migrated, or scanned by an incremental rebuild; the \
+        keys of other bins are added once they are reached, so they \
+        are not counted in it before
+        """
+        if self._old_slot is not None:
+            return slots is not self._old_slot
+        return index < self._bloom_scanned
+
+    def _scan_bloom(self, count):
+        """
+        :param count:
+         the most bins to scan
+        :return:
+        adds the keys of the next count bins to the filter being \
+        rebuilt incrementally, swapping it in once every bin is done; \
+        keys inserted meanwhile into scanned bins are added directly
+        """
+        slots = self.hash_slot
+        next_bloom = self._next_bloom
+        stop = min(self._bloom_scanned + count, len(slots))
+        for i in range(self._bloom_scanned, stop):
+            temp = slots[i]
+            while temp is not None and temp.key is not None:
+                next_bloom.add(temp.key)
+                temp = temp.next
+        self._bloom_scanned = stop
+        if stop == len(slots):
+            self._bloom = next_bloom
+            self._next_bloom = None
+
+    def _relink(self, temp):
+        """
+        :param temp:
+         the head of a chain
+        :return:
+        links every node of the chain into its bin of hash_slot
+        """
+        while temp is not None and temp.key is not None:
+            following = temp.next
+            temp.prev = None
+            temp.next = None
+            self._link(self.hash_slot, self._bin_index(temp.key), temp)
+            temp = following
+
+    def _start_migration(self, bincount):
+        """
+        :param bincount:
+         the number of bins of the grown table
+        :return:
+        swaps in an empty bin array, leaving every entry in the old one \
+        for _migrate to move over
+        """
+        if self._old_slot is not None:
+            self._migrate(len(self._old_slot))
+        self._old_slot = self.hash_slot
+        self._old_home = self._home
+        self._migrated = 0
+        self._bin_count = _next_power_of_two(bincount)
+        self._home = _bin_reducer(self.reduce, self._bin_count)
+        self.hash_slot = _empty_bins(self._bin_count)
+        if self._bloom is not None:
+            self._next_bloom = self._new_bloom()
+
+    def _migrate(self, count):
+        """
+        :param count:
+         the most old bins to move
+        :return:
+        relinks the next count old bins into hash_slot, dropping the \
+        old array once it is empty; a finished migration counts as \
+        one resize and swaps in the next Bloom filter
+        """
+        if self.track_stats:
+            start = default_timer()
+        old_slots = self._old_slot
+        next_bloom = self._next_bloom
+        stop = min(self._migrated + count, len(old_slots))
+        for i in range(self._migrated, stop):
+            if next_bloom is not None:
+                temp = old_slots[i]
+                while temp is not None and temp.key is not None:
+                    next_bloom.add(temp.key)
+                    temp = temp.next
+            self._relink(old_slots[i])
+            old_slots[i] = None
+        self._migrated = stop
+        if stop == len(old_slots):
+            self._old_slot = None
+            self._old_home = None
+            self._resizes += 1
+            if next_bloom is not None:
+                self._bloom = next_bloom
+                self._next_bloom = None
+        if self.track_stats:
+            self._resize_seconds += default_timer() - start
+
+    def stats(self):
+        """
+        :return:
+        returns a dict with the chain-length histogram (bins per \
+        length), the longest chain as max_probe, the mean number of \
+        nodes visited by a successful lookup as mean_probe, the load \
+        factor and the resize counters; while growing incrementally \
+        the unmigrated old bins are included and migrating is True
+        """
+        histogram = {}
+        visited = 0
+        for temp in self._chains():
+            length = 0
+            while temp is not None and temp.key is not None:
+                length += 1
+                temp = temp.next
+            histogram[length] = histogram.get(length, 0) + 1
+            visited += length * (length + 1) // 2
+        report = _stats_report(self, histogram, 0)
+        report["max_probe"] = max(histogram)
+        report["mean_probe"] = \
+            visited / float(self._size) if self._size else 0.0
+        report["migrating"] = self._old_slot is not None
+        return report
+
+    def _link(self, slots, hash_value, new_node):
+        if slots[hash_value].key is None:
+            slots[hash_value] = new_node
+        else:
+            temp = slots[hash_value]
+            slots[hash_value] = new_node
+            new_node.next = temp
+            temp.prev = new_node
+
+    def __getitem__(self, key):
+        """
+        :param key:
+        the key whose value is to be found
+        :return:
+        if the key is found it returns the \
+        value associated with the key  otherwise raise exception
+        """
+        temp = self.find_node(key)
+        if temp is not None:
+            return temp.value
+        else:
+            raise ValueError("Value not found")
+
+    def find_node(self, key):
+        """
+        :param key:
+         the key to look for
+        :return:
+        returns the chain node holding key, or None if it is missing
+        """
+        if self._bloom is not None and key not in self._bloom:
+            return None
+        slots, hash_value = self._locate(key)
+        temp = slots[hash_value]
+        while temp is not None and temp.key != key:
+            temp = temp.next
+        if temp is None or temp.key is None:
+            return None
+        return temp
+
+    def __setitem__(self, key, value):
+        """
+        :param key:
+        find the slot in hash table based on the key \
+        and add the value associated with the key
+        :param value:
+        the value to be inserted for the key
+        :return:
+        """
+        slots, hash_value = self._locate(key)
+        temp = slots[hash_value]
+        while temp and temp.key != key:
+            temp = temp.next
+        if temp and temp.key == key:
+            temp.value = value
+            return
+        self._link(slots, hash_value,
+                   DoublyLinkedNode(key, value, None, None))
+        self._size += 1
+        if self._bloom is not None:
+            self._bloom.add(key)
+            if self._next_bloom is not None and \
+                    self._in_next_bloom(slots, hash_value):
+                self._next_bloom.add(key)
+        if self._old_slot is not None:
+            self._migrate(self.migrate_step)
+        elif self._size > self._max_load * self._bin_count:
+            if self.incremental:
+                self._start_migration(2 * self._bin_count)
+            else:
+                self.rebuild(2 * self._bin_count)
+        elif self._next_bloom is not None:
+            self._scan_bloom(self.migrate_step)
+
+    def __delitem__(self, key):
+        """
+        :param key:
+         delete the key-value pair from the hash table
+        :return:
+        raise exception if key was not found for deletion
+        """
+        slots, hash_value = self._locate(key)
+        temp = slots[hash_value]
+        while temp and temp.key != key:
+            temp = temp.next
+        if not temp:
+            raise ValueError("Value not found")
+        self._size -= 1
+        if temp == slots[hash_value] and not temp.next:
+            slots[hash_value] = DoublyLinkedNode(None, None, None, None)
+        elif temp == slots[hash_value] and temp.next:
+            slots[hash_value] = temp.next
+        elif temp.key == key and temp.next:
+            temp.prev.next = temp.next
+            temp.next.prev = temp.prev
+        elif temp.key == key:
+            temp.prev.next = temp.next
+        if self._bloom is not None:
+            self._bloom.mark_removed()
+            if self._next_bloom is not None and \
+                    self._in_next_bloom(slots, hash_value):
+                self._next_bloom.mark_removed()
+        if self._old_slot is not None:
+            self._migrate(self.migrate_step)
+        elif self._next_bloom is not None:
+            self._scan_bloom(self.migrate_step)
+        if self._bloom is None or self._next_bloom is not None or \
+                not self._bloom.needs_rebuild:
+            return
+        if self.incremental:
+            self._next_bloom = self._new_bloom()
+            self._bloom_scanned = 0
+        else:
+            self._rebuild_bloom()
+
+    def __contains__(self, key):
+        """
+        :param key:
+         check whether the hash table contains key
+        :return:
+        return True if the has table contains key else raise exception
+        """
+        if self.find_node(key) is not None:
+            return True
+        else:
+            raise ValueError("Value not found")
+
+    def contains(self, key):
+        """
+        :param key:
+         check whether the hash table contains key
+        :return:
+        returns True if it does and False otherwise, without raising \
+        on a miss
+        """
+        return self.find_node(key) is not None
+
+    def get(self, key, default=None):
+        """
+        :param key:
+         the key whose value is to be found
+        :param default:
+        returned when the key is missing
+        :return:
+        returns the value associated with the key, or default
+        """
+        temp = self.find_node(key)
+        if temp is None:
+            return default
+        return temp.value
+
+    def __len__(self):
+        """
+        :return:
+        length of the hashtable
+        """
+        return self._size
+
+    def __iter__(self):
+        for temp in self._chains():
+            while temp is not None and temp.key is not None:
+                yield temp.key
+                temp = temp.next
+
+    def iteritems(self):
+        """
+        :return:
+        lazily yields the key-value pairs in bin order
+        """
+        for temp in self._chains():
+            while temp is not None and temp.key is not None:
+                yield temp.key, temp.value
+                temp = temp.next
+
+    def update(self, items):
+        """
+        :param items:
+         a mapping or an iterable of key-value pairs
+        :return:
+        inserts every pair, sizing the table once up front so the \
+        inserts never trigger a rebuild
+        """
+        items = _as_pairs(items)
+        needed = self._size + len(items)
+        if needed > self._max_load * self._bin_count:
+            bins = self._bin_count
+            while needed > self._max_load * bins:
+                bins *= 2
+            self.rebuild(bins)
+        for key, value in items:
+            self[key] = value
+
+    def display_lines(self, limit=None, sample=None):
+        """
+        :param limit:
+         the most bins to show, or None for all
+        :param sample:
+        show only every sample-th bin, or None for all
+        :return:
+        lazily yields one line per bin, with the bins still waiting \
+        to be migrated listed first as "old i:"
+        """
+        arrays = [("", self.hash_slot, 0)]
+        if self._old_slot is not None:
+            arrays.insert(0, ("old ", self._old_slot, self._migrated))
+        for prefix, slots, first in arrays:
+            rows = _display_rows(len(slots) - first, limit, sample)
+            for i in rows:
+                temp = slots[first + i]
+                parts = [prefix, str(first + i), ":"]
+                while temp:
+                    parts += ["(", str(temp.key), ",", str(temp.value), ")->"]
+                    temp = temp.next
+                parts.append("NULL\n")
+                yield "".join(parts)
+            if limit is not None:
+                limit -= len(rows)
+
+    def display(self):
+        """
+        :return:
+        return all the key-value pair as a string
+        """
+        return "".join(self.display_lines())
+
+    def dump(self, fileobj, limit=None, sample=None):
+        """
+        :param fileobj:
+         any object with a write method
+        :param limit:
+        the most bins to write, or None for all
+        :param sample:
+        write only every sample-th bin, or None for all
+        :return:
+        writes the display lines in one pass and constant memory
+        """
+        _write_lines(fileobj, self.display_lines(limit, sample))
+
+    def memory_usage(self):
+        """
+        :return:
+        returns the structural memory report of the hashtable, \
+        counting each distinct placeholder node of the empty bins, \
+        the old bin array while growing incrementally and the bits of \
+        the Bloom filters
+        """
+        placeholders = set()
+        for head in self._chains():
+            if head.key is None:
+                placeholders.add(id(head))
+        container_bytes = sys.getsizeof(self) + sys.getsizeof(self.hash_slot)
+        if self._old_slot is not None:
+            container_bytes += sys.getsizeof(self._old_slot)
+        for bloom in (self._bloom, self._next_bloom):
+            if bloom is not None:
+                container_bytes += sys.getsizeof(bloom.bits)
+        return _memory_report(
+            container_bytes, self._size + len(placeholders),
+            sys.getsizeof(DoublyLinkedNode()), self._size)
+
+
+class _CacheNode(DoublyLinkedNode):
+    __slots__ = ('weight', 'expires')
+
+    def __init__(self, key=None, value=None, weight=0, expires=None):
+        super(_CacheNode, self).__init__(key, value, None, None)
+        self.weight = weight
+        self.expires = expires
+
+
+class LRUCacheDict(object):
+    def __init__(self, capacity=128, weigher=None, ttl=None, on_evict=None,
+                 clock=time.time, hashfunc=hash):
+        """
+        :param capacity:
+         the most entries the cache holds, or the most total weight \
+         when a weigher is given
+        :param weigher:
+        a function of (key, value) returning the weight of an entry, \
+        e.g. lambda k, v: sys.getsizeof(v) to bound the cache in bytes
+        :param ttl:
+        the default number of seconds an entry stays valid, or None
+        :param on_evict:
+        a function of (key, value) called when an entry is evicted \
+        for capacity or dropped because it expired
+        :param clock:
+        the time source used for expiry
+        :param hashfunc:
+        the hash function of the underlying ChainedHashDict
+        """
+        super(LRUCacheDict, self).__init__()
+        self.capacity = capacity
+        self.weigher = weigher
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.clock = clock
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._map = ChainedHashDict(hashfunc=hashfunc)
+        # most recently used first
+        self._order = DoublyLinkedList()
+
+    def _drop(self, node):
+        self._order.remove_node(node)
+        del self._map[node.key]
+        self.weight -= node.weight
+
+    def _lookup(self, key):
+        """
+        :param key:
+         the key to look up
+        :return:
+        returns the live node for key, moved to the front, or None \
+        after dropping it if it has expired
+        """
+        chain_node = self._map.find_node(key)
+        if chain_node is None:
+            return None
+        node = chain_node.value
+        if node.expires is not None and node.expires <= self.clock():
+            self._drop(node)
+            self.expirations += 1
+            if self.on_evict is not None:
+                self.on_evict(node.key, node.value)
+            return None
+        self._order.move_to_front(node)
+        return node
+
+    def get(self, key, default=None):
+        """
+        :param key:
+         the key whose value is to be found
+        :param default:
+        returned when the key is missing or expired
+        :return:
+        returns the cached value and marks it most recently used
+        """
+        node = self._lookup(key)
+        if node is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return node.value
+
+    def put(self, key, value, ttl=None):
+        """
+        :param key:
+         the key to cache
+        :param value:
+        the value associated with the key
+        :param ttl:
+        seconds until this entry expires, overriding the cache default
+        :return:
+        stores the entry as most recently used, evicting the least \
+        recently used entries until the cache is back within capacity
+        """
+        weight = 1 if self.weigher is None else self.weigher(key, value)
+        if weight > self.capacity:
+            raise ValueError("Entry weighs more than the cache capacity")
+        if ttl is None:
+            ttl = self.ttl
+        expires = None if ttl is None else self.clock() + ttl
+        chain_node = self._map.find_node(key)
+        if chain_node is not None:
+            node = chain_node.value
+            self.weight -= node.weight
+            node.value = value
+            node.weight = weight
+            node.expires = expires
+            self._order.move_to_front(node)
+        else:
+            node = _CacheNode(key, value, weight, expires)
+            self._map[key] = node
+            self._order.appendleft_node(node)
+        self.weight += weight
+        while self.weight > self.capacity:
+            victim = self._order.last_node()
+            self._drop(victim)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(victim.key, victim.value)
+
+    def __getitem__(self, key):
+        """
+        :param key:
+         the key whose value is to be found
+        :return:
+        returns the cached value otherwise raise exception
+        """
+        node = self._lookup(key)
+        if node is None:
+            self.misses += 1
+            raise ValueError("Value not found")
+        self.hits += 1
+        return node.value
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __delitem__(self, key):
+        """
+        :param key:
+         the key to drop from the cache, without calling on_evict
+        :return:
+        raise exception if key was not found for deletion
+        """
+        chain_node = self._map.find_node(key)
+        if chain_node is None:
+            raise ValueError("Value not found")
+        self._drop(chain_node.value)
+
+    def __contains__(self, key):
+        """
+        :param key:
+         check whether the cache holds a live entry for key, \
+         without counting a hit or a miss
+        :return:
+        return True if it does else raise exception
+        """
+        chain_node = self._map.find_node(key)
+        if chain_node is not None:
+            expires = chain_node.value.expires
+            if expires is None or expires > self.clock():
+                return True
+        raise ValueError("Value not found")
+
+    def __len__(self):
+        return len(self._map)
+
+    def __iter__(self):
+        node = self._order.head.next
+        while node is not self._order.tail:
+            yield node.key
+            node = node.next
+
+    def iteritems(self):
+        """
+        :return:
+        lazily yields the key-value pairs, most recently used first, \
+        without touching their recency
+        """
+        node = self._order.head.next
+        while node is not self._order.tail:
+            yield node.key, node.value
+            node = node.next
+
+    def stats(self):
+        """
+        :return:
+        returns the hit, miss, eviction and expiration counters \
+        together with the current size and weight
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._map),
+            "weight": self.weight,
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / float(lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def __repr__(self):
+        return "LRUCache:" + "->".join([str(key) for key in self])
+
+
+# An odd multiplier unrelated to _GOLDEN: the top bits of the product
+# pick the shard, independently of the bits each shard uses for a bin
+_SHARD_MULTIPLIER = 0xC2B2AE3D27D4EB4F
+
+
+class ShardedHashDict(object):
+    def __init__(self, shard_count=16, bin_count=10, max_load=0.7,
+                 hashfunc=hash, on_contention=None,
+                 reduce="fibonacci"):
+        """
+        :param shard_count:
+         the number of independent ChainedHashDict shards, rounded up \
+         to a power of two
+        :param bin_count:
+        the initial bin count of every shard
+        :param max_load:
+        the load factor at which a shard grows
+        :param hashfunc:
+        the hash function shared by the shards
+        :param on_contention:
+        a function of (shard index, seconds waited) called whenever \
+        an operation had to wait for a shard lock
+        :param reduce:
+        how every shard maps a hash to a bin, one of REDUCTIONS
+        """
+        super(ShardedHashDict, self).__init__()
+        self.shard_count = _next_power_of_two(shard_count)
+        self._shard_shift = 64 - (self.shard_count.bit_length() - 1)
+        self.hash_func = hashfunc
+        self.shards = [ChainedHashDict(bin_count, max_load, hashfunc,
+                                       reduce=reduce)
+                       for i in range(self.shard_count)]
+        self.locks = [threading.Lock() for i in range(self.shard_count)]
+        self.on_contention = on_contention
+        self.contended = [0 for i in range(self.shard_count)]
+        self.wait_seconds = [0.0 for i in range(self.shard_count)]
+
+    def _shard_index(self, key):
+        if self.shard_count == 1:
+            return 0
+        return ((self.hash_func(key) * _SHARD_MULTIPLIER) & _HASH_MASK) >> \
+            self._shard_shift
+
+    def _acquire(self, index):
+        """
+        :param index:
+         the shard to lock
+        :return:
+        returns the acquired lock, recording the wait if it was held
+        """
+        lock = self.locks[index]
+        if not lock.acquire(False):
+            start = default_timer()
+            lock.acquire()
+            waited = default_timer() - start
+            self.contended[index] += 1
+            self.wait_seconds[index] += waited
+            if self.on_contention is not None:
+                self.on_contention(index, waited)
+        return lock
+
+    def __getitem__(self, key):
+        """
+        :param key:
+         the key whose value is to be found
+        :return:
+        returns the value associated with the key otherwise raise exception
+        """
+        index = self._shard_index(key)
+        lock = self._acquire(index)
+        try:
+            return self.shards[index][key]
+        finally:
+            lock.release()
+
+    def __setitem__(self, key, value):
+        """
+        :param key:
+         the key to store
+        :param value:
+        the value associated with the key
+        :return:
+        stores the entry, growing only the shard that holds it
+        """
+        index = self._shard_index(key)
+        lock = self._acquire(index)
+        try:
+            self.shards[index][key] = value
+        finally:
+            lock.release()
+
+    def __delitem__(self, key):
+        """
+        :param key:
+         delete the key-value pair from its shard
+        :return:
+        raise exception if key was not found for deletion
+        """
+        index = self._shard_index(key)
+        lock = self._acquire(index)
+        try:
+            del self.shards[index][key]
+        finally:
+            lock.release()
+
+    def __contains__(self, key):
+        """
+        :param key:
+         check whether the table contains key
+        :return:
+        return True if the table contains key else raise exception
+        """
+        index = self._shard_index(key)
+        lock = self._acquire(index)
+        try:
+            return key in self.shards[index]
+        finally:
+            lock.release()
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def __iter__(self):
+        for index in range(self.shard_count):
+            lock = self._acquire(index)
+            try:
+                keys = list(self.shards[index])
+            finally:
+                lock.release()
+            for key in keys:
+                yield key
+
+    def update(self, items):
+        """
+        :param items:
+         a mapping or an iterable of key-value pairs
+        :return:
+        inserts every pair, taking each shard lock once
+        """
+        groups = [[] for i in range(self.shard_count)]
+        for key, value in _as_pairs(items):
+            groups[self._shard_index(key)].append((key, value))
+        for index in range(self.shard_count):
+            if groups[index]:
+                lock = self._acquire(index)
+                try:
+                    self.shards[index].update(groups[index])
+                finally:
+                    lock.release()
+
+    def stats(self):
+        """
+        :return:
+        returns the entry count, the stats() of every shard and the \
+        per-shard lock contention counters
+        """
+        return {
+            "entries": len(self),
+            "shards": [shard.stats() for shard in self.shards],
+            "contended": list(self.contended),
+            "wait_seconds": list(self.wait_seconds),
+        }
+
+
+class _Deleted(object):
+    """Marker left behind in a slot vacated by a linear-probing delete."""
+
+    def __repr__(self):
+        return "del"
+
+    def __reduce__(self):
+        # pickle by reference so a restored table still finds its
+        # tombstones with "is _DELETED"
+        return "_DELETED"
+
+
+_DELETED = _Deleted()
+
+
+class OpenAddressHashDict(object):
+    def __init__(self, bin_count=10, max_load=0.7, hashfunc=hash,
+                 robin_hood=False, track_stats=None, reduce="fibonacci",
+                 bloom=False):
+        """
+        :param bloom:
+         keep a BloomFilter of the keys, checked before probing, so \
+         most lookups of missing keys never touch the slots; keys \
+         must then also be hashable by the built-in hash; once more \
+         of its keys are deleted than live, the delete that tips it \
+         over rebuilds the filter from every key, an O(n) pause like \
+         a resize, amortized over those deletes
+        """
+        super(OpenAddressHashDict, self).__init__()
+
+        self._bin_count = _next_power_of_two(bin_count)
+        self._mask = self._bin_count - 1
+        self.reduce = reduce
+        self._home = _bin_reducer(reduce, self._bin_count)
+        self.max_load = max_load
+        self.__load_factor = 0
+        self.i = 1
+        self.robin_hood = robin_hood
+        self._size = 0
+        self._tombstones = 0
+        self.hash_slot = [None for i in range(self._bin_count)]
+        self.hash_value = [None for i in range(self._bin_count)]
+        self._hashes = [None for i in range(self._bin_count)]
+        self.hash_func = hashfunc
+        self.track_stats = COLLECT_STATS if track_stats is None \
+            else track_stats
+        self._resizes = 0
+        self._resize_seconds = 0.0
+        self._bloom = self._new_bloom() if bloom else None
+
+    @property
+    def load_factor(self):
+        return self._size / float(self._bin_count)
+
+    @property
+    def bin_count(self):
+        print self._bin_count
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_home"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._home = _bin_reducer(self.reduce, self._bin_count)
+
+    def rebuild(self, bincount):
+        """
+        :param bincount:
+         the number of slots of the rebuilt table, \
+         rounded up to a power of two
+        :return:
+        rehashes every live entry into the new table and drops tombstones
+        """
+        if self.track_stats:
+            start = default_timer()
+        old_slots = self.hash_slot
+        old_values = self.hash_value
+        old_hashes = self._hashes
+        self._bin_count = _next_power_of_two(bincount)
+        self._mask = self._bin_count - 1
+        self._home = _bin_reducer(self.reduce, self._bin_count)
+        self._size = 0
+        self._tombstones = 0
+        self.hash_slot = [None for i in range(self._bin_count)]
+        self.hash_value = [None for i in range(self._bin_count)]
+        self._hashes = [None for i in range(self._bin_count)]
+        if self._bloom is not None:
+            self._bloom = self._new_bloom()
+        for i in range(len(old_slots)):
+            if old_slots[i] is not None and old_slots[i] is not _DELETED:
+                self._insert(old_slots[i], old_values[i], old_hashes[i])
+        if self.track_stats:
+            self._resizes += 1
+            self._resize_seconds += default_timer() - start
+
+    def _new_bloom(self):
+        """
+        :return:
+        returns an empty BloomFilter sized for twice the entries the \
+        table holds before it grows, so deletes and re-inserts can \
+        add keys for a while before it has to be rebuilt
+        """
+        return BloomFilter(2 * self.max_load * self._bin_count + 1)
+
+    def _rebuild_bloom(self):
+        """
+        :return:
+        replaces the Bloom filter with one holding only the live keys
+        """
+        bloom = self._new_bloom()
+        for key in self:
+            bloom.add(key)
+        self._bloom = bloom
+
+    def stats(self):
+        """
+        :return:
+        returns a dict with the probe-length histogram (entries per \
+        number of slots a successful lookup visits), the max and mean \
+        probe, the tombstone count, the load factor and the resize \
+        counters
+        """
+        histogram = {}
+        total = 0
+        for pos in range(self._bin_count):
+            if self._hashes[pos] is not None:
+                probes = \
+                    ((pos - self._home(self._hashes[pos])) & self._mask) + 1
+                histogram[probes] = histogram.get(probes, 0) + 1
+                total += probes
+        report = _stats_report(self, histogram, self._tombstones)
+        report["max_probe"] = max(histogram) if histogram else 0
+        report["mean_probe"] = \
+            total / float(self._size) if self._size else 0.0
+        return report
+
+    def _reserve(self, count):
+        """
+        :param count:
+         the number of entries about to be inserted
+        :return:
+        makes room for count more entries, growing the table by \
+        doubling when it is full of live entries and only purging \
+        tombstones otherwise; at least one slot is always left empty \
+        so every probe ends, even with max_load=1
+        """
+        limit = self._limit(self._bin_count)
+        if self._size + self._tombstones + count <= limit:
+            return
+        needed = self._size + count
+        if needed > limit / 2:
+            bins = 2 * self._bin_count
+            while needed > self._limit(bins):
+                bins *= 2
+            self.rebuild(bins)
+        else:
+            self.rebuild(self._bin_count)
+
+    def _limit(self, bins):
+        """
+        :param bins:
+         a slot count
+        :return:
+        returns how many live entries and tombstones bins slots may \
+        hold: max_load of them, but never every slot
+        """
+        return min(self.max_load * bins, bins - 1)
+
+    def update(self, items):
+        """
+        :param items:
+         a mapping or an iterable of key-value pairs
+        :return:
+        inserts every pair, sizing the table once up front so the \
+        inserts never trigger a rebuild
+        """
+        items = _as_pairs(items)
+        self._reserve(len(items))
+        hash_func = self.hash_func
+        for key, value in items:
+            self._insert(key, value, hash_func(key))
+
+    def _find(self, key):
+        """
+        :param key:
+         the key to look up
+        :return:
+        returns the slot holding key, or -1 if it is not in the table
+        """
+        if self._bloom is not None and key not in self._bloom:
+            return -1
+        hash_code = self.hash_func(key)
+        mask = self._mask
+        home = self._home
+        slots = self.hash_slot
+        hashes = self._hashes
+        pos = home(hash_code)
+        # a probe never visits more than every slot once, even in a
+        # table that some caller managed to fill completely
+        if self.robin_hood:
+            for dist in xrange(len(slots)):
+                if slots[pos] is None:
+                    return -1
+                if (pos - home(hashes[pos])) & mask < dist:
+                    return -1
+                if hashes[pos] == hash_code and slots[pos] == key:
+                    return pos
+                pos = (pos + 1) & mask
+        else:
+            for dist in xrange(len(slots)):
+                if slots[pos] is None:
+                    return -1
+                if hashes[pos] == hash_code and slots[pos] == key:
+                    return pos
+                pos = (pos + 1) & mask
+        return -1
+
+    def _insert(self, key, value, hash_code):
+        """
+        :param key:
+         the key to store
+        :param value:
+        the value associated with the key
+        :param hash_code:
+        the full hash of the key
+        :return:
+        stores the entry, assuming the table has room for one more
+        """
+        new_key = key
+        mask = self._mask
+        home = self._home
+        slots = self.hash_slot
+        hashes = self._hashes
+        pos = home(hash_code)
+        if self.robin_hood:
+            dist = 0
+            while slots[pos] is not None:
+                if hashes[pos] == hash_code and slots[pos] == key:
+                    self.hash_value[pos] = value
+                    return
+                resident_dist = (pos - home(hashes[pos])) & mask
+                if resident_dist < dist:
+                    key, slots[pos] = slots[pos], key
+                    value, self.hash_value[pos] = self.hash_value[pos], value
+                    hash_code, hashes[pos] = hashes[pos], hash_code
+                    dist = resident_dist
+                pos = (pos + 1) & mask
+                dist += 1
+        else:
+            free = -1
+            while slots[pos] is not None:
+                if slots[pos] is _DELETED:
+                    if free < 0:
+                        free = pos
+                elif hashes[pos] == hash_code and slots[pos] == key:
+                    self.hash_value[pos] = value
+                    return
+                pos = (pos + 1) & mask
+            if free >= 0:
+                pos = free
+                self._tombstones -= 1
+        slots[pos] = key
+        self.hash_value[pos] = value
+        hashes[pos] = hash_code
+        self._size += 1
+        if self._bloom is not None:
+            self._bloom.add(new_key)
+
+    def __getitem__(self, key):
+        """
+        :param key:
+         the value associated with this key
+        :return:
+        returns the value associated with this key otherwise raise exception
+        """
+        pos = self._find(key)
+        if pos < 0:
+            raise ValueError("Value not found")
+        return self.hash_value[pos]
+
+    def __setitem__(self, key, value):
+        """
+        :param key:
+         the key value to be inserted
+        :param value:
+        the value associated with the key
+        :return:
+        """
+        self._reserve(1)
+        self._insert(key, value, self.hash_func(key))
+
+    def __delitem__(self, key):
+        """
+        :param key:
+         the key-value pair that has to be deleted
+        :return:
+        deletes the key-value pair if found otherwise raise exception
+        """
+        pos = self._find(key)
+        if pos < 0:
+            raise ValueError("Value not found")
+        self._size -= 1
+        if not self.robin_hood:
+            self.hash_slot[pos] = _DELETED
+            self.hash_value[pos] = _DELETED
+            self._hashes[pos] = None
+            self._tombstones += 1
+        else:
+            # backward-shift: pull the rest of the cluster one slot
+            # closer to home until an empty slot or an entry already
+            # at home
+            mask = self._mask
+            home = self._home
+            slots = self.hash_slot
+            hashes = self._hashes
+            nxt = (pos + 1) & mask
+            while slots[nxt] is not None and \
+                    (nxt - home(hashes[nxt])) & mask != 0:
+                slots[pos] = slots[nxt]
+                self.hash_value[pos] = self.hash_value[nxt]
+                hashes[pos] = hashes[nxt]
+                pos = nxt
+                nxt = (nxt + 1) & mask
+            slots[pos] = None
+            self.hash_value[pos] = None
+            hashes[pos] = None
+        if self._bloom is not None:
+            self._bloom.mark_removed()
+            if self._bloom.needs_rebuild:
+                self._rebuild_bloom()
+
+    __delitem = __delitem__
+
+    def __contains__(self, key):
+        """
+        :param key:
+         the key which has to be checked in the hash table
+        :return:
+        return true if the key is present\
+         in hash table otherwise raise exception
+        """
+        if self._find(key) >= 0:
+            return True
+        else:
+            raise ValueError("Value not found")
+
+    def contains(self, key):
+        """
+        :param key:
+         the key which has to be checked in the hash table
+        :return:
+        returns True if the key is present and False otherwise, \
+        without raising on a miss
+        """
+        return self._find(key) >= 0
+
+    def get(self, key, default=None):
+        """
+        :param key:
+         the key whose value is to be found
+        :param default:
+        returned when the key is missing
+        :return:
+        returns the value associated with the key, or default
+        """
+        pos = self._find(key)
+        if pos < 0:
+            return default
+        return self.hash_value[pos]
+
+    def __len__(self):
+        """
+        :return:
+        returns the length of hashtable
+        """
+        return self._size
+
+    def __iter__(self):
+        for key in self.hash_slot:
+            if key is not None and key is not _DELETED:
+                yield key
+
+    def iteritems(self):
+        """
+        :return:
+        lazily yields the key-value pairs in slot order
+        """
+        for pos in range(self._bin_count):
+            if self._hashes[pos] is not None:
+                yield self.hash_slot[pos], self.hash_value[pos]
+
+    def display_lines(self, limit=None, sample=None):
+        """
+        :param limit:
+         the most slots to show, or None for all
+        :param sample:
+        show only every sample-th slot, or None for all
+        :return:
+        lazily yields a header line, then one line per slot
+        """
+        yield "Key\t\tValue\n"
+        for i in _display_rows(len(self.hash_slot), limit, sample):
+            yield str(self.hash_slot[i]) + "\t\t" + str(self.hash_value[i]) \
+                + "\n"
+
+    def display(self):
+        """
+        :return:
+        returns all the key-value pair of the hashtable as a string
+        """
+        return "".join(self.display_lines())
+
+    def dump(self, fileobj, limit=None, sample=None):
+        """
+        :param fileobj:
+         any object with a write method
+        :param limit:
+        the most slots to write, or None for all
+        :param sample:
+        write only every sample-th slot, or None for all
+        :return:
+        writes the display lines in one pass and constant memory
+        """
+        _write_lines(fileobj, self.display_lines(limit, sample))
+
+    def memory_usage(self):
+        """
+        :return:
+        returns the structural memory report of the hashtable, \
+        counting the bits of the Bloom filter
+        """
+        container_bytes = sys.getsizeof(self) + \
+            sys.getsizeof(self.hash_slot) + \
+            sys.getsizeof(self.hash_value) + sys.getsizeof(self._hashes)
+        if self._bloom is not None:
+            container_bytes += sys.getsizeof(self._bloom.bits)
+        return _memory_report(container_bytes, 0, 0, self._size)
+
+    def save(self, path):
+        """
+        :param path:
+         the file to write
+        :return:
+        writes the table in the fixed-width format read by open_mmap
+        """
+        bin_count = self._bin_count
+        mask = self._mask
+        table = bytearray(bin_count * _SLOT.size)
+        occupied = bytearray(bin_count)
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, bin_count,
+                                 self._size, REDUCTIONS.index(self.reduce)))
+            f.write(table)
+            offset = _HEADER.size + len(table)
+            for i in range(bin_count):
+                if self._hashes[i] is None:
+                    continue
+                hash_code = self._hashes[i] & _HASH_MASK
+                pos = self._home(hash_code)
+                while occupied[pos]:
+                    pos = (pos + 1) & mask
+                occupied[pos] = 1
+                key_blob = pickle.dumps(self.hash_slot[i], 2)
+                value_blob = pickle.dumps(self.hash_value[i], 2)
+                _SLOT.pack_into(table, pos * _SLOT.size, hash_code, offset,
+                                len(key_blob), len(value_blob))
+                f.write(key_blob)
+                f.write(value_blob)
+                offset += len(key_blob) + len(value_blob)
+            f.seek(_HEADER.size)
+            f.write(table)
+
+    @staticmethod
+    def open_mmap(path, hashfunc=hash):
+        """
+        :param path:
+         a file written by save
+        :param hashfunc:
+        the hash function the table was built with
+        :return:
+        returns a read-only MappedOpenAddressHashDict over the file
+        """
+        return MappedOpenAddressHashDict(path, hashfunc)
+
+
+# On-disk layout of OpenAddressHashDict.save, little-endian:
+#   header: magic, format version, slot count, entry count and the
+#           index of the table's reduction in REDUCTIONS
+#   slots:  one fixed-width record per slot holding the low 64 bits of
+#           the key's hash, the offset of the pickled key (followed by
+#           the pickled value) and both lengths; key length 0 = empty
+#   heap:   the pickled keys and values
+# Entries are laid out by linear probing from the reduced hash.
+_MAGIC = b"OAHD"
+_FORMAT_VERSION = 2
+_HEADER = struct.Struct("<4sIQQI")
+_SLOT = struct.Struct("<QQII")
+
+
+class MappedOpenAddressHashDict(object):
+    def __init__(self, path, hashfunc=hash):
+        super(MappedOpenAddressHashDict, self).__init__()
+        self.hash_func = hashfunc
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, bin_count, size, reduce = \
+            _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            self._map.close()
+            raise ValueError("Not an OpenAddressHashDict file")
+        self._bin_count = bin_count
+        self._mask = bin_count - 1
+        self._home = _bin_reducer(REDUCTIONS[reduce], bin_count)
+        self._size = size
+
+    def _find(self, key):
+        """
+        :param key:
+         the key to look up
+        :return:
+        returns the slot record (hash, offset, key length, value \
+        length) holding key, or None if it is not in the table
+        """
+        hash_code = self.hash_func(key) & _HASH_MASK
+        mapped = self._map
+        pos = self._home(hash_code)
+        for dist in xrange(self._bin_count):
+            record = _SLOT.unpack_from(mapped, _HEADER.size +
+                                       pos * _SLOT.size)
+            if record[2] == 0:
+                return None
+            if record[0] == hash_code:
+                offset = record[1]
+                if pickle.loads(mapped[offset:offset + record[2]]) == key:
+                    return record
+            pos = (pos + 1) & self._mask
+        return None
+
+    def __getitem__(self, key):
+        """
+        :param key:
+         the value associated with this key
+        :return:
+        returns the value associated with this key otherwise raise exception
+        """
+        record = self._find(key)
+        if record is None:
+            raise ValueError("Value not found")
+        start = record[1] + record[2]
+        return pickle.loads(self._map[start:start + record[3]])
+
+    def __contains__(self, key):
+        """
+        :param key:
+         the key which has to be checked in the hash table
+        :return:
+        return true if the key is present\
+         in hash table otherwise raise exception
+        """
+        if self._find(key) is not None:
+            return True
+        else:
+            raise ValueError("Value not found")
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        mapped = self._map
+        for pos in range(self._bin_count):
+            hash_code, offset, key_len, value_len = _SLOT.unpack_from(
+                mapped, _HEADER.size + pos * _SLOT.size)
+            if key_len:
+                yield pickle.loads(mapped[offset:offset + key_len])
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CuckooHashDict(object):
+    """
+    Bucketized cuckoo hashing: every key has two candidate buckets of
+    BUCKET_SIZE slots, picked by two seeded multiply-shift mixes of
+    hashfunc(key) folded to 32 bits (so the products stay machine ints),
+    plus a small shared stash. A lookup reads at most
+    2 * BUCKET_SIZE slots and the stash, whatever the load.
+    """
+
+    BUCKET_SIZE = 4
+
+    def __init__(self, bin_count=16, max_load=0.9, hashfunc=hash,
+                 stash_size=4, max_kicks=100, seed=None, track_stats=None):
+        super(CuckooHashDict, self).__init__()
+
+        self.max_load = max_load
+        self.hash_func = hashfunc
+        self.stash_size = stash_size
+        self.max_kicks = max_kicks
+        self._rng = random.Random(seed)
+        self._size = 0
+        self.stash = []
+        self.track_stats = COLLECT_STATS if track_stats is None \
+            else track_stats
+        self._resizes = 0
+        self._resize_seconds = 0.0
+        self._rehashes = 0
+        self._stash_limit = stash_size
+        self._allocate(bin_count)
+
+    @property
+    def load_factor(self):
+        return self._size / float(self._bin_count)
+
+    @property
+    def bin_count(self):
+        return self._bin_count
+
+    def _allocate(self, bincount):
+        """
+        :param bincount:
+         the number of slots, rounded up to a whole power-of-two number \
+         of buckets
+        :return:
+        empties the table and draws fresh seeds for both bucket mixes
+        """
+        buckets = _next_power_of_two(
+            -(-bincount // self.BUCKET_SIZE))
+        self._bin_count = buckets * self.BUCKET_SIZE
+        self._shift = 32 - (buckets.bit_length() - 1)
+        rng = self._rng
+        self._mixes = ((rng.getrandbits(32), rng.getrandbits(31) | 1),
+                       (rng.getrandbits(32), rng.getrandbits(31) | 1))
+        self.hash_slot = [None for i in range(self._bin_count)]
+        self.hash_value = [None for i in range(self._bin_count)]
+        self._hashes = [None for i in range(self._bin_count)]
+
+    def _buckets(self, hash_code):
+        """
+        :param hash_code:
+         the full hash of a key
+        :return:
+        returns the first slot of both candidate buckets
+        """
+        folded = (hash_code ^ (hash_code >> 32)) & 0xFFFFFFFF
+        (seed1, mult1), (seed2, mult2) = self._mixes
+        shift = self._shift
+        return ((((folded ^ seed1) * mult1) & 0xFFFFFFFF) >> shift) * \
+            self.BUCKET_SIZE, \
+            ((((folded ^ seed2) * mult2) & 0xFFFFFFFF) >> shift) * \
+            self.BUCKET_SIZE
+
+    def _find(self, key, hash_code):
+        """
+        :param key:
+         the key to look up
+        :param hash_code:
+        the full hash of the key
+        :return:
+        returns the slot holding key, -1 - i if it is stash[i], or \
+        None if it is not in the table
+        """
+        slots = self.hash_slot
+        hashes = self._hashes
+        shift = self._shift
+        size = self.BUCKET_SIZE
+        # _buckets inlined: the second bucket is only mixed when the key
+        # is not in the first
+        folded = (hash_code ^ (hash_code >> 32)) & 0xFFFFFFFF
+        for seed, multiplier in self._mixes:
+            start = ((((folded ^ seed) * multiplier) & 0xFFFFFFFF) >>
+                     shift) * size
+            end = start + size
+            # one slice comparison skips buckets without the hash
+            if hash_code in hashes[start:end]:
+                for pos in range(start, end):
+                    if hashes[pos] == hash_code and slots[pos] == key:
+                        return pos
+        for i in range(len(self.stash)):
+            if self.stash[i][2] == hash_code and self.stash[i][0] == key:
+                return -1 - i
+        return None
+
+    def _place(self, key, value, hash_code, kicks):
+        """
+        :param key:
+         the key to store
+        :param value:
+        the value associated with the key
+        :param hash_code:
+        the full hash of the key
+        :param kicks:
+        the number of residents that may be displaced
+        :return:
+        stores the entry in a free slot of one of its buckets, kicking \
+        a random resident over to its other bucket when both are full; \
+        returns the entry left without a slot after kicks moves, or None
+        """
+        slots = self.hash_slot
+        values = self.hash_value
+        hashes = self._hashes
+        size = self.BUCKET_SIZE
+        for kick in range(kicks + 1):
+            first, second = self._buckets(hash_code)
+            for start in (first, second):
+                bucket = hashes[start:start + size]
+                if None in bucket:
+                    pos = start + bucket.index(None)
+                    slots[pos] = key
+                    values[pos] = value
+                    hashes[pos] = hash_code
+                    return None
+            if kick == kicks:
+                break
+            start = first if self._rng.random() < 0.5 else second
+            pos = start + self._rng.randrange(size)
+            key, slots[pos] = slots[pos], key
+            value, values[pos] = values[pos], value
+            hash_code, hashes[pos] = hashes[pos], hash_code
+        return key, value, hash_code
+
+    def rebuild(self, bincount):
+        """
+        :param bincount:
+         the number of slots of the rebuilt table
+        :return:
+        reinserts every entry under fresh seeds, retrying with new seeds \
+        while more than stash_size entries are left over; a hash \
+        function that sends too many keys to the same two buckets can \
+        not be fixed by reseeding, so after a few tries the leftovers \
+        stay in an overfull stash, and the next reseed waits until it \
+        has doubled
+        """
+        if self.track_stats:
+            start = default_timer()
+        entries = list(self._entries())
+        for attempt in range(4):
+            self._allocate(bincount)
+            stash = []
+            kicks = self.max_kicks
+            for key, value, hash_code in entries:
+                homeless = self._place(key, value, hash_code, kicks)
+                if homeless is not None:
+                    stash.append(homeless)
+                    # this attempt has failed, stop paying for kicks
+                    if len(stash) > self.stash_size:
+                        kicks = 0
+            if len(stash) <= self.stash_size:
+                break
+        self.stash = stash
+        self._stash_limit = max(self.stash_size, 2 * len(stash))
+        if self.track_stats:
+            self._resizes += 1
+            self._resize_seconds += default_timer() - start
+
+    def _entries(self):
+        for pos in range(self._bin_count):
+            if self._hashes[pos] is not None:
+                yield self.hash_slot[pos], self.hash_value[pos], \
+                    self._hashes[pos]
+        for entry in self.stash:
+            yield entry
+
+    def stats(self):
+        """
+        :return:
+        returns a dict with the number of entries per bucket choice \
+        (1 or 2 for a table slot, 3 for the stash), the stash length, \
+        the load factor and the resize and rehash counters
+        """
+        histogram = {}
+        for pos in range(self._bin_count):
+            if self._hashes[pos] is not None:
+                choice = 1 if pos // self.BUCKET_SIZE * self.BUCKET_SIZE \
+                    == self._buckets(self._hashes[pos])[0] else 2
+                histogram[choice] = histogram.get(choice, 0) + 1
+        if self.stash:
+            histogram[3] = len(self.stash)
+        report = _stats_report(self, histogram, 0)
+        report["stash"] = len(self.stash)
+        report["rehashes"] = self._rehashes
+        return report
+
+    def __getitem__(self, key):
+        """
+        :param key:
+         the value associated with this key
+        :return:
+        returns the value associated with this key otherwise raise exception
+        """
+        pos = self._find(key, self.hash_func(key))
+        if pos is None:
+            raise ValueError("Value not found")
+        if pos < 0:
+            return self.stash[-1 - pos][1]
+        return self.hash_value[pos]
+
+    def __setitem__(self, key, value):
+        """
+        :param key:
+         the key value to be inserted
+        :param value:
+        the value associated with the key
+        :return:
+        """
+        hash_code = self.hash_func(key)
+        pos = self._find(key, hash_code)
+        if pos is not None:
+            if pos < 0:
+                self.stash[-1 - pos] = (key, value, hash_code)
+            else:
+                self.hash_value[pos] = value
+            return
+        self._size += 1
+        if self._size > self.max_load * self._bin_count:
+            self.rebuild(2 * self._bin_count)
+        # an overfull stash means the kicks already failed for these seeds
+        kicks = 0 if len(self.stash) > self.stash_size else self.max_kicks
+        homeless = self._place(key, value, hash_code, kicks)
+        if homeless is not None:
+            self.stash.append(homeless)
+            if len(self.stash) > self._stash_limit:
+                self._rehashes += 1
+                self.rebuild(self._bin_count)
+
+    def __delitem__(self, key):
+        """
+        :param key:
+         the key-value pair that has to be deleted
+        :return:
+        deletes the key-value pair if found otherwise raise exception
+        """
+        pos = self._find(key, self.hash_func(key))
+        if pos is None:
+            raise ValueError("Value not found")
+        self._size -= 1
+        if pos < 0:
+            del self.stash[-1 - pos]
+            return
+        self.hash_slot[pos] = None
+        self.hash_value[pos] = None
+        self._hashes[pos] = None
+
+    def __contains__(self, key):
+        """
+        :param key:
+         the key which has to be checked in the hash table
+        :return:
+        return true if the key is present\
+         in hash table otherwise raise exception
+        """
+        if self._find(key, self.hash_func(key)) is not None:
+            return True
+        else:
+            raise ValueError("Value not found")
+
+    def __len__(self):
+        """
+        :return:
+        returns the length of hashtable
+        """
+        return self._size
+
+    def __iter__(self):
+        for key, value, hash_code in self._entries():
+            yield key
+
+    def iteritems(self):
+        """
+        :return:
+        lazily yields the key-value pairs in slot order, then the stash
+        """
+        for key, value, hash_code in self._entries():
+            yield key, value
+
+    def update(self, items):
+        """
+        :param items:
+         a mapping or an iterable of key-value pairs
+        :return:
+        inserts every pair, sizing the table once up front
+        """
+        items = _as_pairs(items)
+        needed = self._size + len(items)
+        if needed > self.max_load * self._bin_count:
+            bins = 2 * self._bin_count
+            while needed > self.max_load * bins:
+                bins *= 2
+            self.rebuild(bins)
+        for key, value in items:
+            self[key] = value
+
+    def display_lines(self, limit=None, sample=None):
+        """
+        :param limit:
+         the most slots and stash entries to show, or None for all
+        :param sample:
+        show only every sample-th slot and stash entry, or None for all
+        :return:
+        lazily yields a header line, one line per slot, then one line \
+        per stash entry
+        """
+        yield "Key\t\tValue\n"
+        rows = _display_rows(len(self.hash_slot), limit, sample)
+        for i in rows:
+            yield str(self.hash_slot[i]) + "\t\t" + str(self.hash_value[i]) \
+                + "\n"
+        if limit is not None:
+            limit -= len(rows)
+        for i in _display_rows(len(self.stash), limit, sample):
+            key, value, hash_code = self.stash[i]
+            yield "stash " + str(key) + "\t" + str(value) + "\n"
+
+    def display(self):
+        """
+        :return:
+        returns all the key-value pair of the hashtable as a string, \
+        slot by slot followed by the stash
+        """
+        return "".join(self.display_lines())
+
+    def dump(self, fileobj, limit=None, sample=None):
+        """
+        :param fileobj:
+         any object with a write method
+        :param limit:
+        the most slots and stash entries to write, or None for all
+        :param sample:
+        write only every sample-th slot and stash entry, or None for all
+        :return:
+        writes the display lines in one pass and constant memory
+        """
+        _write_lines(fileobj, self.display_lines(limit, sample))
+
+    def memory_usage(self):
+        """
+        :return:
+        returns the structural memory report of the hashtable
+        """
+        return _memory_report(
+            sys.getsizeof(self) + sys.getsizeof(self.hash_slot) +
+            sys.getsizeof(self.hash_value) + sys.getsizeof(self._hashes) +
+            sys.getsizeof(self.stash) +
+            sum(sys.getsizeof(entry) for entry in self.stash),
+            0, 0, self._size)
+
+
+class IntOpenAddressHashDict(object):
+    def __init__(self, bin_count=16, max_load=0.5, value_dtype="int64"):
+        """
+        :param bin_count:
+         the initial number of slots, rounded up to a power of two
+        :param max_load:
+        the load factor at which the table doubles
+        :param value_dtype:
+        the NumPy dtype of the values
+        """
+        super(IntOpenAddressHashDict, self).__init__()
+        if numpy is None:
+            raise ImportError("IntOpenAddressHashDict requires numpy")
+        self.max_load = max_load
+        self._size = 0
+        self._allocate(max(_next_power_of_two(bin_count), 8),
+                       numpy.dtype(value_dtype))
+
+    def _allocate(self, bin_count, value_dtype):
+        self._bin_count = bin_count
+        self._mask = bin_count - 1
+        self._shift = 64 - (bin_count.bit_length() - 1)
+        self.hash_slot = numpy.zeros(bin_count, dtype=numpy.int64)
+        self.hash_value = numpy.zeros(bin_count, dtype=value_dtype)
+        self._used = numpy.zeros(bin_count, dtype=bool)
+
+    @property
+    def load_factor(self):
+        return self._size / float(self._bin_count)
+
+    def _limit(self, bins):
+        """
+        :param bins:
+         a slot count
+        :return:
+        returns how many entries bins slots may hold: max_load of \
+        them, but never every slot, so every probe ends
+        """
+        return min(self.max_load * bins, bins - 1)
+
+    def _home(self, keys):
+        """
+        :param keys:
+         an int64 array of keys
+        :return:
+        returns each key's home slot by Fibonacci hashing
+        """
+        mixed = keys.astype(numpy.uint64) * numpy.uint64(_GOLDEN)
+        return (mixed >> numpy.uint64(self._shift)).astype(numpy.intp)
+
+    def _home_of(self, key):
+        return (((key & _HASH_MASK) * _GOLDEN) & _HASH_MASK) >> self._shift
+
+    def _find(self, key):
+        """
+        :param key:
+         a single integer key
+        :return:
+        returns the slot holding key, or -1 if it is not in the table
+        """
+        key = int(key)
+        pos = self._home_of(key)
+        for dist in xrange(self._bin_count):
+            if not self._used[pos]:
+                return -1
+            if self.hash_slot[pos] == key:
+                return pos
+            pos = (pos + 1) & self._mask
+        return -1
+
+    def _locate(self, keys):
+        """
+        :param keys:
+         an int64 array of keys
+        :return:
+        returns the slot of every key, or -1 where it is missing; \
+        all keys advance one probe step per vectorized round
+        """
+        found = numpy.full(len(keys), -1, dtype=numpy.intp)
+        pos = self._home(keys)
+        active = numpy.arange(len(keys))
+        for dist in xrange(self._bin_count):
+            if not active.size:
+                break
+            probe = pos[active]
+            used = self._used[probe]
+            hit = used & (self.hash_slot[probe] == keys[active])
+            found[active[hit]] = probe[hit]
+            more = used & ~hit
+            active = active[more]
+            pos[active] = (probe[more] + 1) & self._mask
+        return found
+
+    def _place(self, keys, values):
+        """
+        :param keys:
+         unique int64 keys, none of them in the table yet
+        :param values:
+        the values of the keys
+        :return:
+        inserts the keys, letting the first claimant of a free slot \
+        take it in every vectorized round
+        """
+        pending = numpy.arange(len(keys))
+        pos = self._home(keys)
+        while pending.size:
+            free = numpy.flatnonzero(~self._used[pos])
+            slots, first = numpy.unique(pos[free], return_index=True)
+            winners = pending[free[first]]
+            self._used[slots] = True
+            self.hash_slot[slots] = keys[winners]
+            self.hash_value[slots] = values[winners]
+            placed = numpy.zeros(len(pending), dtype=bool)
+            placed[free[first]] = True
+            pending = pending[~placed]
+            pos = (pos[~placed] + 1) & self._mask
+        self._size += len(keys)
+
+    def rebuild(self, bincount):
+        """
+        :param bincount:
+         the number of slots of the rebuilt table, \
+         rounded up to a power of two
+        :return:
+        rehashes every entry into the new table
+        """
+        keys = self.hash_slot[self._used]
+        values = self.hash_value[self._used]
+        self._allocate(_next_power_of_two(bincount), self.hash_value.dtype)
+        self._size = 0
+        self._place(keys, values)
+
+    def get_many(self, keys, default=0):
+        """
+        :param keys:
+         an array of integer keys
+        :param default:
+        the value reported for missing keys
+        :return:
+        returns an array with the value of every key
+        """
+        keys = numpy.asarray(keys, dtype=numpy.int64)
+        pos = self._locate(keys)
+        result = numpy.full(len(keys), default, dtype=self.hash_value.dtype)
+        hit = pos >= 0
+        result[hit] = self.hash_value[pos[hit]]
+        return result
+
+    def contains_many(self, keys):
+        """
+        :param keys:
+         an array of integer keys
+        :return:
+        returns a boolean array telling which keys are present
+        """
+        return self._locate(numpy.asarray(keys, dtype=numpy.int64)) >= 0
+
+    def set_many(self, keys, values):
+        """
+        :param keys:
+         an array of integer keys
+        :param values:
+        an array of values, or one value for every key; when a key \
+        repeats, its last value wins
+        :return:
+        """
+        keys = numpy.asarray(keys, dtype=numpy.int64)
+        values = numpy.broadcast_to(
+            numpy.asarray(values, dtype=self.hash_value.dtype), keys.shape)
+        last = len(keys) - 1 - numpy.unique(keys[::-1],
+                                            return_index=True)[1]
+        keys = keys[last]
+        values = values[last]
+        pos = self._locate(keys)
+        hit = pos >= 0
+        self.hash_value[pos[hit]] = values[hit]
+        new = ~hit
+        needed = self._size + int(new.sum())
+        if needed > self._limit(self._bin_count):
+            bins = 2 * self._bin_count
+            while needed > self._limit(bins):
+                bins *= 2
+            self.rebuild(bins)
+        self._place(keys[new], values[new])
+
+    def __getitem__(self, key):
+        """
+        :param key:
+         the value associated with this key
+        :return:
+        returns the value associated with this key otherwise raise exception
+        """
+        pos = self._find(key)
+        if pos < 0:
+            raise ValueError("Value not found")
+        return self.hash_value[pos]
+
+    def __setitem__(self, key, value):
+        self.set_many([key], [value])
+
+    def __delitem__(self, key):
+        """
+        :param key:
+         the key-value pair that has to be deleted
+        :return:
+        deletes the key-value pair if found otherwise raise exception; \
+        the rest of the cluster is shifted back so no tombstone is left
+        """
+        i = self._find(key)
+        if i < 0:
+            raise ValueError("Value not found")
+        mask = self._mask
+        j = i
+        while True:
+            j = (j + 1) & mask
+            if not self._used[j]:
+                break
+            home = self._home_of(int(self.hash_slot[j]))
+            # an entry may only move back if i lies on its probe path
+            if (home <= i < j) or (i < j < home) or (j < home <= i):
+                self.hash_slot[i] = self.hash_slot[j]
+                self.hash_value[i] = self.hash_value[j]
+                i = j
+        self._used[i] = False
+        self._size -= 1
+
+    def __contains__(self, key):
+        """
+        :param key:
+         the key which has to be checked in the hash table
+        :return:
+        return true if the key is present\
+         in hash table otherwise raise exception
+        """
+        if self._find(key) >= 0:
+            return True
+        else:
+            raise ValueError("Value not found")
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self.hash_slot[self._used].tolist())
+
+    def iteritems(self):
+        """
+        :return:
+        lazily yields the key-value pairs in slot order
+        """
+        keys = self.hash_slot[self._used].tolist()
+        values = self.hash_value[self._used].tolist()
+        return iter(zip(keys, values))
+
+    def memory_usage(self):
+        """
+        :return:
+        returns the structural memory report of the hashtable
+        """
+        return _memory_report(
+            sys.getsizeof(self) + self.hash_slot.nbytes +
+            self.hash_value.nbytes + self._used.nbytes, 0, 0, self._size)
+
+
+RED = True
+BLACK = False
+
+
+class BinaryTreeNode(object):
+    __slots__ = ('key', 'value', 'left', 'right', 'parent', 'color', 'size')
+
+    def __init__(self, key=None, value=None, left=None, right=None,
+                 parent=None, color=RED):
+        super(BinaryTreeNode, self).__init__()
+        self.key = key
+        self.value = value
+        self.left = left
+        self.right = right
+        self.parent = parent
+        self.color = color
+        self.size = 1
+
+
+def _color(node):
+    if node is None:
+        return BLACK
+    return node.color
+
+
+def _subtree_size(node):
+    if node is None:
+        return 0
+    return node.size
+
+
+class BinarySearchTreeDict(object):
+    def __init__(self, balanced=False):
+        super(BinarySearchTreeDict, self).__init__()
+        self.root = None
+        self.parent = None
+        self._height = None
+        self.length = 0
+        self.balanced = balanced
+
+    @classmethod
+    def from_sorted(cls, items, balanced=False, count=None):
+        """
+        :param items:
+         key-value pairs in strictly increasing key order
+        :param balanced:
+        whether the returned tree stays red-black on later updates
+        :param count:
+        the number of pairs; when given, items is consumed lazily \
+        as a stream instead of being materialized first
+        :return:
+        returns a perfectly balanced tree built in linear time, \
+        otherwise raise exception if the keys are not sorted
+        """
+        if count is None:
+            items = _as_pairs(items)
+            count = len(items)
+        entries = iter(items)
+        tree = cls(balanced)
+        tree.length = count
+        # every level but the deepest is full, so colouring the deepest
+        # level red and everything else black is a valid red-black tree
+        bottom = count.bit_length() - 1
+        full = count == (1 << (bottom + 1)) - 1
+        last = []
+
+        def build(size, parent, depth):
+            if size == 0:
+                return None
+            color = RED if depth == bottom and not full else BLACK
+            node = BinaryTreeNode(None, None, None, None, parent, color)
+            node.left = build(size // 2, node, depth + 1)
+            try:
+                node.key, node.value = next(entries)
+            except StopIteration:
+                raise ValueError("Fewer items than count")
+            if last and not last[0] < node.key:
+                raise ValueError("Keys must be sorted and unique")
+            last[:] = [node.key]
+            node.right = build(size - size // 2 - 1, node, depth + 1)
+            node.size = size
+            return node
+
+        tree.root = build(count, None, 0)
+        return tree
+
+    def __reduce__(self):
+        return _tree_from_sorted, \
+            ([(key, value) for key, value in self.iteritems()],
+             self.balanced)
+
+    @property
+    def height(self):
+        """
+        :return:
+        returns the height of the tree
+        """
+        return self.height_rec(self.root)
+
+    def height_rec(self, node):
+        height = 0
+        level = [node] if node else []
+        while level:
+            height += 1
+            level = [child for n in level for child in (n.left, n.right)
+                     if child is not None]
+        return height
+
+    def inorder_keys_rec(self, node):
+        stack = []
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                yield [node.key, node.value]
+                node = node.right
+
+    def inorder_keys(self):
+        """
+        :return:
+        returns the inorder traversal of the tree
+        """
+        return [n for n in self.inorder_keys_rec(self.root)]
+
+    def postorder_keys_rec(self, node):
+        stack = []
+        last = None
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+            else:
+                top = stack[-1]
+                if top.right is not None and top.right is not last:
+                    node = top.right
+                else:
+                    yield [top.key, top.value]
+                    last = stack.pop()
+
+    def postorder_keys(self):
+        """
+        :return:
+        returns the postorder traversal of the tree
+        """
+        return [n for n in self.postorder_keys_rec(self.root)]
+
+    def preorder_keys_rec(self, node):
+        stack = [node] if node else []
+        while stack:
+            node = stack.pop()
+            yield [node.key, node.value]
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+
+    def preorder_keys(self):
+        """
+        :return:
+        return the preorder traversal of the key
+        """
+        return [n for n in self.preorder_keys_rec(self.root)]
+
+    def items(self):
+        """
+        :return:
+        return the in-order traversal of the key
+        """
+        tree_in = [n for n in self.inorder_keys()]
+        return tree_in
+
+    def iteritems(self):
+        """
+        :return:
+        lazily yields the key-value pairs in key order
+        """
+        return self.inorder_keys_rec(self.root)
+
+    def __iter__(self):
+        node = self.treeminimum(self.root) if self.root else None
+        while node is not None:
+            yield node.key
+            node = self.successor(node)
+
+    def __reversed__(self):
+        node = self.treemaximum(self.root) if self.root else None
+        while node is not None:
+            yield node.key
+            node = self.predecessor(node)
+
+    def range(self, lo=None, hi=None, reverse=False):
+        """
+        :param lo:
+         the smallest key to yield, or None for no lower bound
+        :param hi:
+        the key to stop before, or None for no upper bound
+        :param reverse:
+        yield from hi down to lo instead
+        :return:
+        lazily yields the key-value pairs with lo <= key < hi
+        """
+        if not reverse:
+            if lo is None:
+                node = self.treeminimum(self.root) if self.root else None
+            else:
+                node = self.ceiling_node(lo)
+            while node is not None and (hi is None or node.key < hi):
+                yield [node.key, node.value]
+                node = self.successor(node)
+        else:
+            if hi is None:
+                node = self.treemaximum(self.root) if self.root else None
+            else:
+                node = self.floor_node(hi, inclusive=False)
+            while node is not None and (lo is None or node.key >= lo):
+                yield [node.key, node.value]
+                node = self.predecessor(node)
+
+    def iter_from(self, key, reverse=False):
+        """
+        :param key:
+         the key to start from, which need not be in the tree
+        :param reverse:
+        walk towards smaller keys instead
+        :return:
+        lazily yields the key-value pairs from key onwards
+        """
+        if reverse:
+            return self._walk(self.floor_node(key), True)
+        return self._walk(self.ceiling_node(key), False)
+
+    def _walk(self, node, reverse):
+        while node is not None:
+            yield [node.key, node.value]
+            node = self.predecessor(node) if reverse \
+                else self.successor(node)
+
+    def find_node(self, node, key):
+        """
+        :param node:
+         the root of the subtree to search
+        :param key:
+        the key to look for
+        :return:
+        returns the node holding key, or None if it is not in the subtree
+        """
+        while node is not None and node.key != key:
+            if key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        return node
+
+    def getitem_rec(self, node, key):
+        node = self.find_node(node, key)
+        if node is None:
+            return None
+        return node.value
+
+    def __getitem__(self, key):
+        """
+        :param key:
+         get the value associated with the key
+        :return:
+        return tha value found at that particular key
+        """
+        return self.getitem_rec(self.root, key)
+
+    def contain_recursive(self, node, key):
+        return self.getitem_rec(node, key)
+
+    def __contains__(self, key):
+        """
+        :param key:
+         the key which has to be checked if it exist
+        :return:
+        return True is found otherwise raise exception
+        """
+        if self.find_node(self.root, key) is not None:
+            return True
+        else:
+            raise ValueError("Key not found")
+
+    def contains(self, key):
+        """
+        :param key:
+         the key which has to be checked if it exist
+        :return:
+        returns True if found and False otherwise, without raising \
+        on a miss
+        """
+        return self.find_node(self.root, key) is not None
+
+    def get(self, key, default=None):
+        """
+        :param key:
+         the key whose value is to be found
+        :param default:
+        returned when the key is missing
+        :return:
+        returns the value associated with the key, or default
+        """
+        node = self.find_node(self.root, key)
+        if node is None:
+            return default
+        return node.value
+
+    def __setitem__(self, key, value):
+        """
+        :param key:
+         the key that has to be inserted in the tree
+        :param value:
+        the value that has to be associated with the key
+        :return:
+        """
+        y = None
+        x = self.root
+        while x is not None:
+            y = x
+            if key < x.key:
+                x = x.left
+            elif key > x.key:
+                x = x.right
+            else:
+                break
+        if x is not None:
+            x.value = value
+        else:
+            z = BinaryTreeNode(key, value, None, None, y)
+            if y is None:
+                self.root = z
+            elif key < y.key:
+                y.left = z
+            else:
+                y.right = z
+            self.length += 1
+            while y is not None:
+                y.size += 1
+                y = y.parent
+            if self.balanced:
+                self.insert_fixup(z)
+
+    def __delitem__(self, key):
+        """
+        :param key:
+         the key which has to be deleted from tree
+        :return:
+        if key is found it is deleted otherwise raise exception
+        """
+        temp = self.find_node(self.root, key)
+        if temp is None:
+            raise ValueError("Value not found")
+        self.delete_node(temp)
+
+    def __delitem(self, key):
+        """
+        :param key:
+         the key which has to be deleted from tree
+        :return:
+        if key is found it is deleted otherwise raise exception
+        """
+        if self.root is None:
+            print "Tree is empty"
+        else:
+            temp = self.find_node(self.root, key)
+            if temp is not None:
+                print "Key found: ", key, " value = ", \
+                    temp.value, " and deleted"
+                self.delete_node(temp)
+            else:
+                raise ValueError("Value not found")
+
+    def delete_node(self, temp):
+        """
+        :param temp:
+         the node which has to be removed from the tree
+        :return:
+        unlinks the node, rebalancing afterwards in balanced mode
+        """
+        y_color = temp.color
+        if temp.left is None:
+            x, x_parent = temp.right, temp.parent
+            self.transplant(temp, temp.right)
+        elif temp.right is None:
+            x, x_parent = temp.left, temp.parent
+            self.transplant(temp, temp.left)
+        else:
+            y = self.treeminimum(temp.right)
+            y_color = y.color
+            x = y.right
+            if y.parent != temp:
+                x_parent = y.parent
+                self.transplant(y, y.right)
+                y.right = temp.right
+                y.right.parent = y
+            else:
+                x_parent = y
+            self.transplant(temp, y)
+            y.left = temp.left
+            y.left.parent = y
+            y.color = temp.color
+        self.length -= 1
+        node = x_parent
+        while node is not None:
+            node.size = 1 + _subtree_size(node.left) + \
+                _subtree_size(node.right)
+            node = node.parent
+        if self.balanced and y_color == BLACK:
+            self.delete_fixup(x, x_parent)
+
+    def treeminimum(self, x):
+        """
+        :param x:
+        find min element rooted at node x
+        :return:
+        return the min element rooted at x
+        """
+        while x.left is not None:
+            x = x.left
+        return x
+
+    def treemaximum(self, x):
+        """
+        :param x:
+        find max element rooted at node x
+        :return:
+        return the max element rooted at x
+        """
+        while x.right is not None:
+            x = x.right
+        return x
+
+    def successor(self, x):
+        """
+        :param x:
+         a node of the tree
+        :return:
+        return the node with the next larger key, or None
+        """
+        if x.right is not None:
+            return self.treeminimum(x.right)
+        y = x.parent
+        while y is not None and x == y.right:
+            x = y
+            y = y.parent
+        return y
+
+    def predecessor(self, x):
+        """
+        :param x:
+         a node of the tree
+        :return:
+        return the node with the next smaller key, or None
+        """
+        if x.left is not None:
+            return self.treemaximum(x.left)
+        y = x.parent
+        while y is not None and x == y.left:
+            x = y
+            y = y.parent
+        return y
+
+    def ceiling_node(self, key, inclusive=True):
+        """
+        :param key:
+         the key to bound from below
+        :param inclusive:
+        whether a node holding key itself qualifies
+        :return:
+        return the node with the smallest key >= key (> key if not \
+        inclusive), or None
+        """
+        node = self.root
+        best = None
+        while node is not None:
+            if node.key > key or (inclusive and node.key == key):
+                best = node
+                node = node.left
+            else:
+                node = node.right
+        return best
+
+    def floor_node(self, key, inclusive=True):
+        """
+        :param key:
+         the key to bound from above
+        :param inclusive:
+        whether a node holding key itself qualifies
+        :return:
+        return the node with the largest key <= key (< key if not \
+        inclusive), or None
+        """
+        node = self.root
+        best = None
+        while node is not None:
+            if node.key < key or (inclusive and node.key == key):
+                best = node
+                node = node.right
+            else:
+                node = node.left
+        return best
+
+    def transplant(self, u, v):
+        if u.parent is None:
+            self.root = v
+        elif u == u.parent.left:
+            u.parent.left = v
+        else:
+            u.parent.right = v
+        if v is not None:
+            v.parent = u.parent
+
+    def left_rotate(self, x):
+        y = x.right
+        x.right = y.left
+        if y.left is not None:
+            y.left.parent = x
+        self.transplant(x, y)
+        y.left = x
+        x.parent = y
+        y.size = x.size
+        x.size = 1 + _subtree_size(x.left) + _subtree_size(x.right)
+
+    def right_rotate(self, x):
+        y = x.left
+        x.left = y.right
+        if y.right is not None:
+            y.right.parent = x
+        self.transplant(x, y)
+        y.right = x
+        x.parent = y
+        y.size = x.size
+        x.size = 1 + _subtree_size(x.left) + _subtree_size(x.right)
+
+    def insert_fixup(self, z):
+        """
+        :param z:
+         the red node that was just linked into the tree
+        :return:
+        recolors and rotates until no red node has a red parent
+        """
+        while z.parent is not None and z.parent.color == RED:
+            grandparent = z.parent.parent
+            if z.parent == grandparent.left:
+                uncle = grandparent.right
+                if _color(uncle) == RED:
+                    z.parent.color = BLACK
+                    uncle.color = BLACK
+                    grandparent.color = RED
+                    z = grandparent
+                else:
+                    if z == z.parent.right:
+                        z = z.parent
+                        self.left_rotate(z)
+                    z.parent.color = BLACK
+                    grandparent.color = RED
+                    self.right_rotate(grandparent)
+            else:
+                uncle = grandparent.left
+                if _color(uncle) == RED:
+                    z.parent.color = BLACK
+                    uncle.color = BLACK
+                    grandparent.color = RED
+                    z = grandparent
+                else:
+                    if z == z.parent.left:
+                        z = z.parent
+                        self.right_rotate(z)
+                    z.parent.color = BLACK
+                    grandparent.color = RED
+                    self.left_rotate(grandparent)
+        self.root.color = BLACK
+
+    def delete_fixup(self, x, x_parent):
+        """
+        :param x:
+         the node (possibly None) that took the removed black node's place
+        :param x_parent:
+        the parent of x, needed when x is None
+        :return:
+        restores equal black height on every root-to-leaf path
+        """
+        while x is not self.root and _color(x) == BLACK:
+            if x is x_parent.left:
+                w = x_parent.right
+                if w.color == RED:
+                    w.color = BLACK
+                    x_parent.color = RED
+                    self.left_rotate(x_parent)
+                    w = x_parent.right
+                if _color(w.left) == BLACK and _color(w.right) == BLACK:
+                    w.color = RED
+                    x, x_parent = x_parent, x_parent.parent
+                else:
+                    if _color(w.right) == BLACK:
+                        w.left.color = BLACK
+                        w.color = RED
+                        self.right_rotate(w)
+                        w = x_parent.right
+                    w.color = x_parent.color
+                    x_parent.color = BLACK
+                    w.right.color = BLACK
+                    self.left_rotate(x_parent)
+                    x = self.root
+            else:
+                w = x_parent.left
+                if w.color == RED:
+                    w.color = BLACK
+                    x_parent.color = RED
+                    self.right_rotate(x_parent)
+                    w = x_parent.left
+                if _color(w.left) == BLACK and _color(w.right) == BLACK:
+                    w.color = RED
+                    x, x_parent = x_parent, x_parent.parent
+                else:
+                    if _color(w.left) == BLACK:
+                        w.right.color = BLACK
+                        w.color = RED
+                        self.left_rotate(w)
+                        w = x_parent.left
+                    w.color = x_parent.color
+                    x_parent.color = BLACK
+                    w.left.color = BLACK
+                    self.right_rotate(x_parent)
+                    x = self.root
+        if x is not None:
+            x.color = BLACK
+
+    def __len__(self):
+        """
+        :return:
+        return the length of the tree
+        """
+        return self.length
+
+    def rank(self, key):
+        """
+        :param key:
+         the key to rank, which need not be in the tree
+        :return:
+        return the number of keys in the tree smaller than key
+        """
+        node = self.root
+        count = 0
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                count += _subtree_size(node.left) + 1
+                node = node.right
+            else:
+                return count + _subtree_size(node.left)
+        return count
+
+    def select(self, i):
+        """
+        :param i:
+         the zero-based position in key order
+        :return:
+        return the i-th smallest key, otherwise raise exception
+        """
+        if i < 0 or i >= _subtree_size(self.root):
+            raise ValueError("Index out of range")
+        node = self.root
+        while True:
+            left_size = _subtree_size(node.left)
+            if i < left_size:
+                node = node.left
+            elif i > left_size:
+                i -= left_size + 1
+                node = node.right
+            else:
+                return node.key
+
+    def count_range(self, lo=None, hi=None):
+        """
+        :param lo:
+         the smallest key to count, or None for no lower bound
+        :param hi:
+        the key to stop before, or None for no upper bound
+        :return:
+        return the number of keys with lo <= key < hi
+        """
+        upper = self.length if hi is None else self.rank(hi)
+        lower = 0 if lo is None else self.rank(lo)
+        return max(upper - lower, 0)
+
+    def floor(self, key):
+        """
+        :param key:
+         the key to bound from above
+        :return:
+        return the largest key <= key, or None
+        """
+        node = self.floor_node(key)
+        return None if node is None else node.key
+
+    def ceiling(self, key):
+        """
+        :param key:
+         the key to bound from below
+        :return:
+        return the smallest key >= key, or None
+        """
+        node = self.ceiling_node(key)
+        return None if node is None else node.key
+
+    def nearest(self, key):
+        """
+        :param key:
+         the key to look around
+        :return:
+        return the (floor, ceiling) pair of keys around key
+        """
+        return self.floor(key), self.ceiling(key)
+
+    def display(self):
+        """
+        :return:
+        return the inorder and preorder traversal of the tree
+        """
+        tree_in = [n for n in self.inorder_keys()]
+        tree_pre = [n for n in self.preorder_keys()]
+        return tree_in, tree_pre
+
+    def memory_usage(self):
+        """
+        :return:
+        returns the structural memory report of the tree
+        """
+        return _memory_report(sys.getsizeof(self), self.length,
+                              sys.getsizeof(BinaryTreeNode()), self.length)
+
+
+def _tree_from_sorted(items, balanced):
+    return BinarySearchTreeDict.from_sorted(items, balanced)
+
+
+class PersistentTreeNode(object):
+    __slots__ = ('key', 'value', 'left', 'right', 'height', 'size')
+
+    def __init__(self, key=None, value=None, left=None, right=None):
+        super(PersistentTreeNode, self).__init__()
+        self.key = key
+        self.value = value
+        self.left = left
+        self.right = right
+        # every update builds O(log n) nodes, so this is kept free of
+        # helper calls
+        height = 0
+        size = 1
+        if left is not None:
+            height = left.height
+            size += left.size
+        if right is not None:
+            if right.height > height:
+                height = right.height
+            size += right.size
+        self.height = height + 1
+        self.size = size
+
+
+def _node_height(node):
+    if node is None:
+        return 0
+    return node.height
+
+
+class PersistentTreeDict(object):
+    def __init__(self, root=None):
+        """
+        :param root:
+         the PersistentTreeNode at the root of the version to wrap; \
+         nodes are never changed once built, so any number of trees \
+         can share them
+        """
+        super(PersistentTreeDict, self).__init__()
+        self.root = root
+        # writers serialize on the lock; readers never take it
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_sorted(cls, items):
+        """
+        :param items:
+         key-value pairs in strictly increasing key order
+        :return:
+        returns a perfectly balanced tree built in linear time, \
+        otherwise raise exception if the keys are not sorted
+        """
+        items = _as_pairs(items)
+        for i in range(1, len(items)):
+            if not items[i - 1][0] < items[i][0]:
+                raise ValueError("Keys must be sorted and unique")
+
+        def build(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            return PersistentTreeNode(items[mid][0], items[mid][1],
+                                      build(lo, mid), build(mid + 1, hi))
+
+        return cls(build(0, len(items)))
+
+    def __reduce__(self):
+        return _persistent_tree_from_sorted, \
+            ([(key, value) for key, value in self.iteritems()],)
+
+    def snapshot(self):
+        """
+        :return:
+        returns a tree sharing this version's root in O(1); later \
+        updates to either tree leave the other unchanged
+        """
+        return PersistentTreeDict(self.root)
+
+    @property
+    def height(self):
+        """
+        :return:
+        returns the height of the tree
+        """
+        return _node_height(self.root)
+
+    def _balance(self, key, value, left, right):
+        """
+        :param key:
+         the key of the new node
+        :param value:
+        the value of the new node
+        :param left:
+        the left subtree, an AVL tree
+        :param right:
+        the right subtree, an AVL tree whose height differs from \
+        left's by at most two
+        :return:
+        returns a new AVL tree of key and both subtrees, copying only \
+        the nodes a single or double rotation moves
+        """
+        left_height = _node_height(left)
+        right_height = _node_height(right)
+        if left_height > right_height + 1:
+            if _node_height(left.left) < _node_height(left.right):
+                pivot = left.right
+                return PersistentTreeNode(
+                    pivot.key, pivot.value,
+                    PersistentTreeNode(left.key, left.value, left.left,
+                                       pivot.left),
+                    PersistentTreeNode(key, value, pivot.right, right))
+            return PersistentTreeNode(
+                left.key, left.value, left.left,
+                PersistentTreeNode(key, value, left.right, right))
+        if right_height > left_height + 1:
+            if _node_height(right.right) < _node_height(right.left):
+                pivot = right.left
+                return PersistentTreeNode(
+                    pivot.key, pivot.value,
+                    PersistentTreeNode(key, value, left, pivot.left),
+                    PersistentTreeNode(right.key, right.value,
+                                       pivot.right, right.right))
+            return PersistentTreeNode(
+                right.key, right.value,
+                PersistentTreeNode(key, value, left, right.left),
+                right.right)
+        return PersistentTreeNode(key, value, left, right)
+
+    def _copy_path(self, path, key, node):
+        """
+        :param path:
+         the nodes from the root down to the parent of a changed subtree
+        :param key:
+        the key whose search led down path
+        :param node:
+        the new root of the changed subtree
+        :return:
+        returns the new root, made of copies of the path nodes above \
+        node, rebalanced on the way up
+        """
+        for parent in reversed(path):
+            if key < parent.key:
+                left, right = node, parent.right
+            else:
+                left, right = parent.left, node
+            skew = (0 if left is None else left.height) - \
+                (0 if right is None else right.height)
+            if -1 <= skew <= 1:
+                node = PersistentTreeNode(parent.key, parent.value, left,
+                                          right)
+            else:
+                node = self._balance(parent.key, parent.value, left, right)
+        return node
+
+    def _insert(self, node, key, value):
+        """
+        :param node:
+         the root of the version to insert into
+        :param key:
+        the key to store
+        :param value:
+        the value associated with the key
+        :return:
+        returns the root of a new version holding the entry, which \
+        copies the path down to key and shares every other node
+        """
+        path = []
+        while node is not None and node.key != key:
+            path.append(node)
+            if key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        if node is None:
+            node = PersistentTreeNode(key, value)
+        else:
+            node = PersistentTreeNode(key, value, node.left, node.right)
+        return self._copy_path(path, key, node)
+
+    def _delete(self, node, key):
+        """
+        :param node:
+         the root of the version to delete from
+        :param key:
+        the key to delete
+        :return:
+        returns the root of a new version without key, copying only \
+        the path to it and to its successor, otherwise raise \
+        exception if key is not in the tree
+        """
+        path = []
+        while node is not None and node.key != key:
+            path.append(node)
+            if key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        if node is None:
+            raise ValueError("Value not found")
+        if node.left is None:
+            replacement = node.right
+        elif node.right is None:
+            replacement = node.left
+        else:
+            # the successor takes the deleted node's place
+            lefts = []
+            successor = node.right
+            while successor.left is not None:
+                lefts.append(successor)
+                successor = successor.left
+            right = successor.right
+            for parent in reversed(lefts):
+                right = self._balance(parent.key, parent.value, right,
+                                      parent.right)
+            replacement = self._balance(successor.key, successor.value,
+                                        node.left, right)
+        return self._copy_path(path, key, replacement)
+
+    def inserted(self, key, value):
+        """
+        :param key:
+         the key to store
+        :param value:
+        the value associated with the key
+        :return:
+        returns a new tree holding the entry, leaving this one \
+        unchanged; the two share all but O(log n) nodes
+        """
+        return PersistentTreeDict(self._insert(self.root, key, value))
+
+    def deleted(self, key):
+        """
+        :param key:
+         the key to leave out
+        :return:
+        returns a new tree without key, leaving this one unchanged, \
+        otherwise raise exception if key was not found
+        """
+        return PersistentTreeDict(self._delete(self.root, key))
+
+    def __setitem__(self, key, value):
+        """
+        :param key:
+         the key to store
+        :param value:
+        the value associated with the key
+        :return:
+        moves this tree to a new version holding the entry; \
+        snapshots and iterations already under way keep the old one
+        """
+        with self._lock:
+            self.root = self._insert(self.root, key, value)
+
+    def __delitem__(self, key):
+        """
+        :param key:
+         the key which has to be deleted from tree
+        :return:
+        moves this tree to a new version without key if it is found \
+        otherwise raise exception
+        """
+        with self._lock:
+            self.root = self._delete(self.root, key)
+
+    def update(self, items):
+        """
+        :param items:
+         a mapping or an iterable of key-value pairs
+        :return:
+        inserts every pair and publishes the result as one new \
+        version, so readers never see part of the batch
+        """
+        with self._lock:
+            root = self.root
+            for key, value in _as_pairs(items):
+                root = self._insert(root, key, value)
+            self.root = root
+
+    def find_node(self, key):
+        """
+        :param key:
+         the key to look for
+        :return:
+        returns the node holding key, or None if it is not in the tree
+        """
+        node = self.root
+        while node is not None and node.key != key:
+            if key < node.key:
+                node = node.left
+            else:
+                node = node.right
+        return node
+
+    def __getitem__(self, key):
+        """
+        :param key:
+         get the value associated with the key
         :return:
-        returns the new rebuilt hash
+        return tha value found at that particular key
         """
-        new_hash_slot = [None for i in range(bincount)]
-        new_hash_value = [None for i in range(bincount)]
-        self.hash_slot = self.hash_slot + new_hash_slot
-        self.hash_value = self.hash_value + new_hash_value
+        node = self.find_node(key)
+        if node is None:
+            return None
+        return node.value
 
-    def __getitem__(self, key):
+    def get(self, key, default=None):
         """
         :param key:
-         the value associated with this key
+         the key whose value is to be found
+        :param default:
+        returned when the key is missing
         :return:
-        returns the value associated with this key otherwise raise exception
+        returns the value associated with the key, or default
         """
-        hash_index = self.hash_func(key)
-        value = None
-        stop = False
-        found = False
-        pos = hash_index
-        while self.hash_slot[pos] is not None and not stop and not found:
-            if self.hash_slot[pos] == key:
-                found = True
-                value = self.hash_value[pos]
-            else:
-                pos = (pos + 1) % self._bin_count
-                if pos == hash_index:
-                    stop = True
-        if value:
-            return value
-        else:
-            raise ValueError("Value not found")
+        node = self.find_node(key)
+        if node is None:
+            return default
+        return node.value
 
-    def __setitem__(self, key, value):
+    def __contains__(self, key):
         """
         :param key:
-         the key value to be inserted
-        :param value:
-        the value associated with the key
+         the key which has to be checked if it exist
         :return:
+        return True is found otherwise raise exception
         """
-        if self.load_factor == self.max_load:
-            self.rebuild(10)
-            self._bin_count += 10
-        hash_index = self.hash_func(key)
-        if self.hash_slot[hash_index] is None or \
-                self.hash_slot[hash_index] is "del" or\
-                self.hash_slot[hash_index] == key:
-            self.hash_slot[hash_index] = key
-            self.hash_value[hash_index] = value
+        if self.find_node(key) is not None:
+            return True
         else:
-            while self.hash_slot[hash_index] is not None and \
-                    self.hash_slot[hash_index] is not "del" and \
-                    self.hash_slot[hash_index] != key:
-                hash_index = (hash_index + 1) % self._bin_count
-            self.hash_slot[hash_index] = key
-            self.hash_value[hash_index] = value
+            raise ValueError("Key not found")
 
-    def __delitem(self, key):
+    def contains(self, key):
         """
         :param key:
-         the key-value pair that has to be deleted
+         the key which has to be checked if it exist
         :return:
-        deletes the key-value pair if found otherwise raise exception
+        returns True if found and False otherwise, without raising \
+        on a miss
         """
-        stop = False
-        found = False
-        start_index = self.hash_func(key)
-        pos = start_index
-        while self.hash_slot[pos] is not None and not stop and not found:
-            if self.hash_slot[pos] == key:
-                self.hash_slot[pos] = "del"
-                self.hash_value[pos] = "del"
-                found = True
-            else:
-                pos = (pos + 1) % self._bin_count
-                if pos == start_index:
-                    stop = True
-        if not found:
-            raise ValueError("Value not found")
+        return self.find_node(key) is not None
 
-    def __contains__(self, key):
+    def __len__(self):
         """
-        :param key:
-         the key which has to be checked in the hash table
         :return:
-        return true if the key is present\
-         in hash table otherwise raise exception
+        returns the number of keys, kept in the root
         """
-        hash_index_start = self.hash_func(key)
-        stop = False
-        found = False
-        pos = hash_index_start
-        while self.hash_slot[pos] is not None and not stop and not found:
-            if self.hash_slot[pos] == key:
-                found = True
+        return _subtree_size(self.root)
+
+    def _walk(self, node, lo, hi, reverse):
+        # the caller passes in the root, so the walk stays on the
+        # version it started on whatever writers do meanwhile
+        stack = []
+        while stack or node is not None:
+            if node is not None:
+                if reverse:
+                    if hi is not None and not node.key < hi:
+                        node = node.left
+                        continue
+                    stack.append(node)
+                    node = node.right
+                else:
+                    if lo is not None and node.key < lo:
+                        node = node.right
+                        continue
+                    stack.append(node)
+                    node = node.left
             else:
-                pos = (pos + 1) % self._bin_count
-                if pos == hash_index_start:
-                    stop = True
-        if found:
-            return found
-        else:
-            raise ValueError("Value not found")
+                node = stack.pop()
+                if reverse and lo is not None and node.key < lo:
+                    return
+                if not reverse and hi is not None and not node.key < hi:
+                    return
+                yield [node.key, node.value]
+                node = node.left if reverse else node.right
 
-    def __len__(self):
+    def range(self, lo=None, hi=None, reverse=False):
         """
+        :param lo:
+         the smallest key to yield, or None for no lower bound
+        :param hi:
+        the key to stop before, or None for no upper bound
+        :param reverse:
+        yield from hi down to lo instead
         :return:
-        returns the length of hashtable
+        lazily yields the key-value pairs with lo <= key < hi
         """
-        count = 0
-        for i in range(len(self.hash_slot)):
-            if self.hash_slot[i] is not None:
-                count += 1
-        return count
+        return self._walk(self.root, lo, hi, reverse)
 
-    def display(self):
+    def iteritems(self):
         """
         :return:
-        returns all the key-value pair of the hashtable as a string
+        lazily yields the key-value pairs in key order
         """
-        s = ""
-        s += "Key\t\tValue\n"
-        for i in range(len(self.hash_slot)):
-            s += str(self.hash_slot[i]) + "\t\t" + str(self.hash_value[i]) \
-                + "\n"
-        return s
+        return self._walk(self.root, None, None, False)
 
+    def items(self):
+        """
+        :return:
+        return the in-order traversal of the key
+        """
+        return [n for n in self.iteritems()]
 
-class BinaryTreeNode(object):
-    def __init__(self, data=None, left=None, right=None, parent=None):
-        super(BinaryTreeNode, self).__init__()
-        self.data = data
-        self.left = left
-        self.right = right
-        self.parent = parent
+    def __iter__(self):
+        for key, value in self.iteritems():
+            yield key
 
+    def __reversed__(self):
+        for key, value in self._walk(self.root, None, None, True):
+            yield key
 
-class BinarySearchTreeDict(object):
-    def __init__(self):
-        super(BinarySearchTreeDict, self).__init__()
-        self.root = None
-        self.parent = None
-        self._height = None
+    def __repr__(self):
+        return "PersistentTree:" + "->".join([str(key) for key in self])
+
+    def memory_usage(self):
+        """
+        :return:
+        returns the structural memory report of this version, \
+        counting shared nodes as its own
+        """
+        size = len(self)
+        return _memory_report(sys.getsizeof(self), size,
+                              sys.getsizeof(PersistentTreeNode()), size)
+
+
+def _persistent_tree_from_sorted(items):
+    return PersistentTreeDict.from_sorted(items)
+
+
+class BTreeNode(object):
+    __slots__ = ('keys', 'values', 'children')
+
+    def __init__(self, keys=None, values=None, children=None):
+        super(BTreeNode, self).__init__()
+        self.keys = [] if keys is None else keys
+        self.values = [] if values is None else values
+        # empty for a leaf, otherwise one more child than keys
+        self.children = [] if children is None else children
+
+
+class BTreeDict(object):
+    def __init__(self, degree=32):
+        """
+        :param degree:
+         the minimum degree: every node but the root holds between \
+         degree - 1 and 2 * degree - 1 keys in sorted arrays
+        """
+        super(BTreeDict, self).__init__()
+        if degree < 2:
+            raise ValueError("Degree must be at least 2")
+        self.degree = degree
+        self.root = BTreeNode()
         self.length = 0
-        pass
 
     @property
     def height(self):
@@ -470,20 +4272,29 @@ class BinarySearchTreeDict(object):
         :return:
         returns the height of the tree
         """
-        return self.height_rec(self.root)
-
-    def height_rec(self, node):
-        if not node:
+        if not self.root.keys:
             return 0
-        return max(self.height_rec(node.left), self.height_rec(node.right)) + 1
+        height = 1
+        node = self.root
+        while node.children:
+            node = node.children[0]
+            height += 1
+        return height
 
     def inorder_keys_rec(self, node):
-        if node:
-            for data in self.inorder_keys_rec(node.left):
-                yield data
-            yield node.data
-            for data in self.inorder_keys_rec(node.right):
-                yield data
+        # (node, i): yield key i - 1, then walk child i
+        stack = [(node, 0)]
+        while stack:
+            node, i = stack.pop()
+            if not node.children:
+                for pos in range(len(node.keys)):
+                    yield [node.keys[pos], node.values[pos]]
+                continue
+            if i > 0:
+                yield [node.keys[i - 1], node.values[i - 1]]
+            if i < len(node.keys):
+                stack.append((node, i + 1))
+            stack.append((node.children[i], 0))
 
     def inorder_keys(self):
         """
@@ -493,32 +4304,38 @@ class BinarySearchTreeDict(object):
         return [n for n in self.inorder_keys_rec(self.root)]
 
     def postorder_keys_rec(self, node):
-        if node:
-            for data in self.postorder_keys_rec(node.left):
-                yield data
-            for data in self.postorder_keys_rec(node.right):
-                yield data
-            yield node.data
+        stack = [(node, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded or not node.children:
+                for pos in range(len(node.keys)):
+                    yield [node.keys[pos], node.values[pos]]
+            else:
+                stack.append((node, True))
+                stack.extend((child, False)
+                             for child in reversed(node.children))
 
     def postorder_keys(self):
         """
         :return:
-        returns the postorder traversal of the tree
+        returns the postorder traversal of the tree, each node's keys \
+        after all of its subtrees
         """
         return [n for n in self.postorder_keys_rec(self.root)]
 
     def preorder_keys_rec(self, node):
-        if node:
-            yield node.data
-            for data in self.preorder_keys_rec(node.left):
-                yield data
-            for data in self.preorder_keys_rec(node.right):
-                yield data
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for pos in range(len(node.keys)):
+                yield [node.keys[pos], node.values[pos]]
+            stack.extend(reversed(node.children))
 
     def preorder_keys(self):
         """
         :return:
-        return the preorder traversal of the key
+        return the preorder traversal of the tree, each node's keys \
+        before any of its subtrees
         """
         return [n for n in self.preorder_keys_rec(self.root)]
 
@@ -527,18 +4344,36 @@ class BinarySearchTreeDict(object):
         :return:
         return the in-order traversal of the key
         """
-        tree_in = [n for n in self.inorder_keys()]
-        return tree_in
+        return self.inorder_keys()
 
-    def getitem_rec(self, node, key):
-        if None == node:
-            return None
-        elif node.data[0] == key:
-            return node.data[1]
-        elif key < node.data[0]:
-            return self.contain_recursive(node.left, key)
-        else:
-            return self.contain_recursive(node.right, key)
+    def iteritems(self):
+        """
+        :return:
+        lazily yields the key-value pairs in key order
+        """
+        return self.inorder_keys_rec(self.root)
+
+    def __iter__(self):
+        for key, value in self.inorder_keys_rec(self.root):
+            yield key
+
+    def find_node(self, key):
+        """
+        :param key:
+         the key to look for
+        :return:
+        returns the node holding key and the key's index in it, \
+        or (None, -1) if it is not in the tree
+        """
+        node = self.root
+        while True:
+            keys = node.keys
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                return node, i
+            if not node.children:
+                return None, -1
+            node = node.children[i]
 
     def __getitem__(self, key):
         """
@@ -547,17 +4382,10 @@ class BinarySearchTreeDict(object):
         :return:
         return tha value found at that particular key
         """
-        return self.getitem_rec(self.root, key)
-
-    def contain_recursive(self, node, key):
-        if None == node:
+        node, i = self.find_node(key)
+        if node is None:
             return None
-        elif node.data[0] == key:
-            return node.data[1]
-        elif key < node.data[0]:
-            return self.contain_recursive(node.left, key)
-        else:
-            return self.contain_recursive(node.right, key)
+        return node.values[i]
 
     def __contains__(self, key):
         """
@@ -566,12 +4394,32 @@ class BinarySearchTreeDict(object):
         :return:
         return True is found otherwise raise exception
         """
-        val = self.contain_recursive(self.root, key)
-        if val:
+        if self.find_node(key)[0] is not None:
             return True
         else:
             raise ValueError("Key not found")
 
+    def split_child(self, parent, i):
+        """
+        :param parent:
+         a node that is not full
+        :param i:
+        the index of a full child of parent
+        :return:
+        moves the child's median key up into parent and its upper half \
+        into a new right sibling
+        """
+        t = self.degree
+        child = parent.children[i]
+        sibling = BTreeNode(child.keys[t:], child.values[t:],
+                            child.children[t:])
+        parent.keys.insert(i, child.keys[t - 1])
+        parent.values.insert(i, child.values[t - 1])
+        parent.children.insert(i + 1, sibling)
+        del child.keys[t - 1:]
+        del child.values[t - 1:]
+        del child.children[t:]
+
     def __setitem__(self, key, value):
         """
         :param key:
@@ -580,85 +4428,137 @@ class BinarySearchTreeDict(object):
         the value that has to be associated with the key
         :return:
         """
-        y = None
-        x = self.root
-        z = BinaryTreeNode([key, value], None, None, None)
-        while x is not None:
-            y = x
-            if z.data[0] < x.data[0]:
-                x = x.left
-            elif z.data[0] > x.data[0]:
-                x = x.right
-            else:
-                break
-        if x and (x.data[0] == z.data[0]):
-            x.data[1] = z.data[1]
-        else:
-            z.parent = y
-            if y is None:
-                self.root = z
-            elif z.data[0] < y.data[0]:
-                y.left = z
-            else:
-                y.right = z
-            self.length += 1
+        full = 2 * self.degree - 1
+        if len(self.root.keys) == full:
+            root = BTreeNode(children=[self.root])
+            self.split_child(root, 0)
+            self.root = root
+        node = self.root
+        # every node entered below has room for a key moved up into it
+        while True:
+            i = bisect_left(node.keys, key)
+            if i < len(node.keys) and node.keys[i] == key:
+                node.values[i] = value
+                return
+            if not node.children:
+                node.keys.insert(i, key)
+                node.values.insert(i, value)
+                self.length += 1
+                return
+            if len(node.children[i].keys) == full:
+                self.split_child(node, i)
+                if node.keys[i] == key:
+                    node.values[i] = value
+                    return
+                if node.keys[i] < key:
+                    i += 1
+            node = node.children[i]
 
-    def __delitem(self, key):
+    def merge_children(self, node, i):
         """
-        :param key:
-         the key which has to be deleted from tree
+        :param node:
+         a node holding at least degree keys, or the root
+        :param i:
+        the index of a child with degree - 1 keys whose right sibling \
+        also has degree - 1 keys
         :return:
-        if key is found it is deleted otherwise raise exception
+        pulls key i down and merges both children into one full node
         """
-        if self.root is None:
-            print "Tree is empty"
-        else:
-            temp = self.root
-            while temp is not None and temp.data[0] != key:
-                if temp.data[0] < key:
-                    temp = temp.right
-                else:
-                    temp = temp.left
-            if temp is not None:
-                print "Key found: ", key, " value = ", \
-                    temp.data[1], " and deleted"
-                if temp.left is None:
-                    self.transplant(temp, temp.right)
-                elif temp.right is None:
-                    self.transplant(temp, temp.left)
-                else:
-                    y = self.treeminimum(temp.right)
-                    if y.parent != temp:
-                        self.transplant(y, y.right)
-                        y.right = temp.right
-                        y.right.parent = y
-                    self.transplant(temp, y)
-                    y.left = temp.left
-                    y.left.parent = y
-                self.length -= 1
-            else:
-                raise ValueError("Value not found")
+        left = node.children[i]
+        right = node.children.pop(i + 1)
+        left.keys.append(node.keys.pop(i))
+        left.values.append(node.values.pop(i))
+        left.keys.extend(right.keys)
+        left.values.extend(right.values)
+        left.children.extend(right.children)
 
-    def treeminimum(self, x):
+    def _fill_child(self, node, i):
         """
-        :param x:
-        find min element rooted at node x
+        :param node:
+         a node holding at least degree keys, or the root
+        :param i:
+        the index of a child with only degree - 1 keys
         :return:
-        return the min element rooted at x
+        returns the child to descend into after giving it a key \
+        borrowed through node from a sibling, or after merging it \
+        with a sibling
         """
-        while x.left is not None:
-            x = x.left
-        return x
+        t = self.degree
+        child = node.children[i]
+        if i > 0 and len(node.children[i - 1].keys) >= t:
+            left = node.children[i - 1]
+            child.keys.insert(0, node.keys[i - 1])
+            child.values.insert(0, node.values[i - 1])
+            node.keys[i - 1] = left.keys.pop()
+            node.values[i - 1] = left.values.pop()
+            if left.children:
+                child.children.insert(0, left.children.pop())
+            return child
+        if i < len(node.keys) and len(node.children[i + 1].keys) >= t:
+            right = node.children[i + 1]
+            child.keys.append(node.keys[i])
+            child.values.append(node.values[i])
+            node.keys[i] = right.keys.pop(0)
+            node.values[i] = right.values.pop(0)
+            if right.children:
+                child.children.append(right.children.pop(0))
+            return child
+        if i < len(node.keys):
+            self.merge_children(node, i)
+            return child
+        self.merge_children(node, i - 1)
+        return node.children[i - 1]
 
-    def transplant(self, u, v):
-        if u.parent is None:
-            self.root = v
-        elif u == u.parent.left:
-            u.parent.left = v
-        else:
-            u.parent.right = v
-        if v is not None:
-            v.parent = u.parent
+    def __delitem__(self, key):
+        """
+        :param key:
+         the key which has to be deleted from tree
+        :return:
+        if key is found it is deleted otherwise raise exception
+        """
+        t = self.degree
+        node = self.root
+        # single pass down: every node entered below the root holds at
+        # least degree keys, so a key can always be taken out of it
+        while True:
+            keys = node.keys
+            i = bisect_left(keys, key)
+            found = i < len(keys) and keys[i] == key
+            if not node.children:
+                if found:
+                    del keys[i]
+                    del node.values[i]
+                    self.length -= 1
+                break
+            if not found:
+                if len(node.children[i].keys) < t:
+                    node = self._fill_child(node, i)
+                else:
+                    node = node.children[i]
+                continue
+            left = node.children[i]
+            right = node.children[i + 1]
+            if len(left.keys) >= t:
+                # replace key with its predecessor, then delete that
+                temp = left
+                while temp.children:
+                    temp = temp.children[-1]
+                keys[i], node.values[i] = temp.keys[-1], temp.values[-1]
+                node, key = left, temp.keys[-1]
+            elif len(right.keys) >= t:
+                temp = right
+                while temp.children:
+                    temp = temp.children[0]
+                keys[i], node.values[i] = temp.keys[0], temp.values[0]
+                node, key = right, temp.keys[0]
+            else:
+                self.merge_children(node, i)
+                node = left
+        # a merge may have emptied the root even if key was missing
+        if not self.root.keys and self.root.children:
+            self.root = self.root.children[0]
+        if not found:
+            raise ValueError("Value not found")
 
     def __len__(self):
         """
@@ -676,6 +4576,518 @@ class BinarySearchTreeDict(object):
         tree_pre = [n for n in self.preorder_keys()]
         return tree_in, tree_pre
 
+    def memory_usage(self):
+        """
+        :return:
+        returns the structural memory report of the tree, counting the \
+        key, value and child arrays of every node
+        """
+        node_count = 0
+        array_bytes = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node_count += 1
+            array_bytes += sys.getsizeof(node.keys) + \
+                sys.getsizeof(node.values) + sys.getsizeof(node.children)
+            stack.extend(node.children)
+        return _memory_report(sys.getsizeof(self) + array_bytes, node_count,
+                              sys.getsizeof(BTreeNode()), self.length)
+
+
+# A serialized container is a stream of pickles: a header tuple
+# (_STREAM_MAGIC, class name, entry count, constructor options), then
+# lists of entries in iteration order, then None.
+_STREAM_MAGIC = "DSSTREAM1"
+
+
+def serialize(container, fileobj, batch_size=65536):
+    """
+    :param container:
+     a SinglyLinkedList, ChainedHashDict, OpenAddressHashDict or \
+     BinarySearchTreeDict
+    :param fileobj:
+    any object with a write method
+    :param batch_size:
+    the number of entries pickled together
+    :return:
+    writes the container iteratively, one batch of entries at a time
+    """
+    if isinstance(container, SinglyLinkedList):
+        options = {}
+        entries = container.iteritems()
+    elif isinstance(container, ChainedHashDict):
+        options = {"max_load": container._max_load,
+                   "reduce": container.reduce,
+                   "incremental": container.incremental,
+                   "bloom": container._bloom is not None}
+        entries = container.iteritems()
+    elif isinstance(container, OpenAddressHashDict):
+        options = {"max_load": container.max_load,
+                   "robin_hood": container.robin_hood,
+                   "reduce": container.reduce,
+                   "bloom": container._bloom is not None}
+        entries = container.iteritems()
+    elif isinstance(container, BinarySearchTreeDict):
+        options = {"balanced": container.balanced}
+        entries = container.iteritems()
+    else:
+        raise ValueError("Container can not be serialized")
+    pickle.dump((_STREAM_MAGIC, type(container).__name__, len(container),
+                 options), fileobj, 2)
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) == batch_size:
+            pickle.dump(batch, fileobj, 2)
+            batch = []
+    if batch:
+        pickle.dump(batch, fileobj, 2)
+    pickle.dump(None, fileobj, 2)
+
+
+def deserialize(fileobj, hashfunc=hash):
+    """
+    :param fileobj:
+     any object with read and readline methods, positioned at the \
+     start of a stream written by serialize
+    :param hashfunc:
+    the hash function for a hash table, which is not serialized
+    :return:
+    returns the container, bulk-built from the stream
+    """
+    header = pickle.load(fileobj)
+    if not isinstance(header, tuple) or header[0] != _STREAM_MAGIC:
+        raise ValueError("Not a serialized container")
+    magic, kind, count, options = header
+
+    def batches():
+        batch = pickle.load(fileobj)
+        while batch is not None:
+            yield batch
+            batch = pickle.load(fileobj)
+
+    if kind == "BinarySearchTreeDict":
+        entries = (entry for batch in batches() for entry in batch)
+        return BinarySearchTreeDict.from_sorted(entries, count=count,
+                                                **options)
+    if kind == "SinglyLinkedList":
+        container = SinglyLinkedList()
+        for batch in batches():
+            container.extend(batch)
+        return container
+    if kind == "ChainedHashDict":
+        container = ChainedHashDict(
+            int(count / options["max_load"]) + 10, hashfunc=hashfunc,
+            **options)
+    elif kind == "OpenAddressHashDict":
+        container = OpenAddressHashDict(
+            int(count / options["max_load"]) + 10, hashfunc=hashfunc,
+            **options)
+    else:
+        raise ValueError("Not a serialized container")
+    for batch in batches():
+        container.update(batch)
+    return container
+
+
+def _layout_partition(task):
+    """
+    :param task:
+     (kind, reduce, bin_count, lo, width, keys, values, hashes): the \
+     entries whose home bins lie in [lo, lo + width) of a table of \
+     bin_count bins, with kind "chained", "linear" or "robin_hood"
+    :return:
+    returns the flat layout of that bin range, built the way the \
+    table's own inserts would lay it out: for a chained table one \
+    [key, value, key, value, ...] list or None per bin; for an \
+    open-addressing table the slot, value and hash lists of the range \
+    and the (key, value, hash) entries that probed past its end
+    """
+    kind, reduce, bin_count, lo, width, keys, values, hashes = task
+    home = _bin_reducer(reduce, bin_count)
+    if kind == "chained":
+        chains = [None] * width
+        for i in xrange(len(keys)):
+            key = keys[i]
+            index = home(hashes[i]) - lo
+            chain = chains[index]
+            if chain is None:
+                chains[index] = [key, values[i]]
+                continue
+            for j in xrange(0, len(chain), 2):
+                if chain[j] == key:
+                    chain[j + 1] = values[i]
+                    break
+            else:
+                chain.append(key)
+                chain.append(values[i])
+        return chains
+    robin_hood = kind == "robin_hood"
+    slots = [None] * width
+    slot_values = [None] * width
+    slot_hashes = [None] * width
+    # entries pushed past the end are re-inserted by the parent, which
+    # wraps them into the next range; a later duplicate of one of them
+    # updates it there rather than landing in this range
+    overflow = []
+    overflow_hashes = set()
+    for i in xrange(len(keys)):
+        key = keys[i]
+        value = values[i]
+        hash_code = hashes[i]
+        if hash_code in overflow_hashes:
+            found = False
+            for entry in overflow:
+                if entry[2] == hash_code and entry[0] == key:
+                    entry[1] = value
+                    found = True
+                    break
+            if found:
+                continue
+        pos = home(hash_code) - lo
+        dist = 0
+        while pos < width and slots[pos] is not None:
+            if slot_hashes[pos] == hash_code and slots[pos] == key:
+                slot_values[pos] = value
+                break
+            if robin_hood:
+                resident_dist = pos - (home(slot_hashes[pos]) - lo)
+                if resident_dist < dist:
+                    key, slots[pos] = slots[pos], key
+                    value, slot_values[pos] = slot_values[pos], value
+                    hash_code, slot_hashes[pos] = slot_hashes[pos], hash_code
+                    dist = resident_dist
+            pos += 1
+            dist += 1
+        else:
+            if pos == width:
+                overflow.append([key, value, hash_code])
+                overflow_hashes.add(hash_code)
+            else:
+                slots[pos] = key
+                slot_values[pos] = value
+                slot_hashes[pos] = hash_code
+    return slots, slot_values, slot_hashes, overflow
+
+
+def _place_partition(table, kind, lo, layout):
+    """
+    :param table:
+     the table being built, with all of its bins still empty in \
+     [lo, lo + width)
+    :param kind:
+    "chained", "linear" or "robin_hood"
+    :param lo:
+    the first bin of the range
+    :param layout:
+    what _layout_partition returned for the range
+    :return:
+    splices the range into the table, creating only chain nodes one \
+    by one, and returns the entries that overflowed the range, to be \
+    inserted once every range is in place
+    """
+    if kind == "chained":
+        slots = table.hash_slot
+        size = 0
+        for i in xrange(len(layout)):
+            chain = layout[i]
+            if chain is None:
+                continue
+            head = None
+            for j in xrange(0, len(chain), 2):
+                node = DoublyLinkedNode(chain[j], chain[j + 1], head, None)
+                if head is not None:
+                    head.prev = node
+                head = node
+            slots[lo + i] = head
+            size += len(chain) // 2
+        table._size += size
+        return []
+    slots, values, hashes, overflow = layout
+    hi = lo + len(slots)
+    table.hash_slot[lo:hi] = slots
+    table.hash_value[lo:hi] = values
+    table._hashes[lo:hi] = hashes
+    table._size += len(slots) - slots.count(None)
+    return overflow
+
+
+def parallel_build(items, table_class=ChainedHashDict, processes=None,
+                   partitions=None, sharded=False, hashfunc=hash,
+                   count=None, **options):
+    """
+    :param items:
+     a mapping or an iterable of key-value pairs, read once as a stream
+    :param table_class:
+    ChainedHashDict or OpenAddressHashDict
+    :param processes:
+    the size of the process pool, by default one per CPU
+    :param partitions:
+    the number of partitions, rounded up to a power of two; \
+    by default the pool size
+    :param sharded:
+    return the partition tables as a ShardedHashDict instead of \
+    one table
+    :param hashfunc:
+    the hash function of the tables; it has to be picklable, so a \
+    module-level function rather than a lambda
+    :param count:
+    the number of pairs when items is an iterator without a length; \
+    a mask-reduced table needs its final size to partition, so \
+    without it items is read into a list first, and if it turns out \
+    too small the pairs are partitioned again for a larger table
+    :param options:
+    further constructor arguments of table_class, e.g. max_load
+    :return:
+    returns the table built by hashing items once in this process, \
+    into one bin range of the final table per partition, and laying \
+    every range out in its own worker process; the ranges come back \
+    as flat lists and are spliced in place rather than re-inserted
+    """
+    if table_class is ChainedHashDict:
+        kind = "chained"
+    elif table_class is OpenAddressHashDict:
+        kind = "robin_hood" if options.get("robin_hood") else "linear"
+    else:
+        raise ValueError("Table class can not be built in parallel")
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if partitions is None:
+        partitions = processes
+    partitions = _next_power_of_two(partitions)
+    part_bits = partitions.bit_length() - 1
+    options = dict(options, hashfunc=hashfunc)
+    reduce = options.get("reduce", "fibonacci")
+    max_load = options.get("max_load", 0.7)
+    if count is None and hasattr(items, "__len__"):
+        count = len(items)
+    if hasattr(items, 'iteritems'):
+        items = items.iteritems()
+
+    def bins_for(entries):
+        return _next_power_of_two(max(int(entries / max_load) + 1, 16,
+                                      partitions))
+
+    # the partition of a hash is the top part_bits of its shard or bin
+    # index, which for fibonacci reduction does not depend on the
+    # final bin count
+    if sharded:
+        shift = 64 - part_bits
+        multiplier = _SHARD_MULTIPLIER
+    elif reduce == "fibonacci":
+        shift = 64 - part_bits
+        multiplier = _GOLDEN
+    else:
+        if count is None:
+            items = _as_pairs(items)
+            count = len(items)
+        bin_count = bins_for(count)
+        shift = bin_count.bit_length() - 1 - part_bits
+        multiplier = 1
+    groups = [([], [], []) for i in range(partitions)]
+    for key, value in items:
+        hash_code = hashfunc(key)
+        if partitions == 1:
+            group = groups[0]
+        elif multiplier == 1:
+            group = groups[((hash_code & _HASH_MASK) >> shift) &
+                           (partitions - 1)]
+        else:
+            group = groups[((hash_code * multiplier) & _HASH_MASK) >> shift]
+        group[0].append(key)
+        group[1].append(value)
+        group[2].append(hash_code)
+    total = sum(len(group[0]) for group in groups)
+    if multiplier == 1 and bins_for(total) > bin_count:
+        # count was too small: the bin index of every hash, and so its
+        # partition, changes with the larger table
+        bin_count = bins_for(total)
+        shift = bin_count.bit_length() - 1 - part_bits
+        old_groups = groups
+        groups = [([], [], []) for i in range(partitions)]
+        for keys, values, hashes in old_groups:
+            for key, value, hash_code in zip(keys, values, hashes):
+                group = groups[((hash_code & _HASH_MASK) >> shift) &
+                               (partitions - 1)]
+                group[0].append(key)
+                group[1].append(value)
+                group[2].append(hash_code)
+        old_groups = None
+
+    if sharded:
+        tables = [table_class(bins_for(len(group[0])), **options)
+                  for group in groups]
+        ranges = [(table, 0, table._bin_count) for table in tables]
+    else:
+        if multiplier != 1:
+            bin_count = bins_for(total)
+        tables = [table_class(bin_count, **options)]
+        width = bin_count // partitions
+        ranges = [(tables[0], p * width, width) for p in range(partitions)]
+
+    def tasks():
+        for p in range(partitions):
+            keys, values, hashes = groups[p]
+            groups[p] = None
+            target, lo, width = ranges[p]
+            yield (kind, target.reduce, target._bin_count, lo, width,
+                   keys, values, hashes)
+
+    if processes == 1:
+        layouts = (_layout_partition(task) for task in tasks())
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes)
+        layouts = pool.imap(_layout_partition, tasks(), chunksize=1)
+    overflow = [[] for table in tables]
+    try:
+        for p, layout in enumerate(layouts):
+            target, lo, width = ranges[p]
+            overflow[p if sharded else 0].extend(
+                _place_partition(target, kind, lo, layout))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    for table, entries in zip(tables, overflow):
+        if entries:
+            # probed past the end of their range; _insert needs room
+            table._reserve(len(entries))
+        for key, value, hash_code in entries:
+            table._insert(key, value, hash_code)
+        if table._bloom is not None:
+            table._rebuild_bloom()
+    if sharded:
+        view = ShardedHashDict(partitions, max_load=max_load,
+                               hashfunc=hashfunc, reduce=reduce)
+        view.shards = tables
+        return view
+    return tables[0]
+
+
+def universal_hash(seed=None):
+    """A seeded member of the multiply-add-shift universal family.
+
+    Keys are first hashed with the built-in hash, so keys whose
+    built-in hashes are distinct collide with probability about
+    2**-64 for a random seed, however they are clustered.
+
+    :param seed:
+        Selects the member of the family; None picks one at random.
+
+    :return:
+        A python function that can be passed into the constructor
+        of a hash table to use for hashing objects.
+    """
+    rng = random.Random(seed)
+    a = rng.getrandbits(128) | 1
+    b = rng.getrandbits(128)
+    mask128 = (1 << 128) - 1
+
+    def hashfunc(item):
+        return ((a * (hash(item) & _HASH_MASK) + b) & mask128) >> 64
+
+    return hashfunc
+
+
+def _rotl(x, b):
+    return ((x << b) | (x >> (64 - b))) & _HASH_MASK
+
+
+def _siphash24(k0, k1, data):
+    """
+    :param k0:
+     the low 64 bits of the secret key
+    :param k1:
+    the high 64 bits of the secret key
+    :param data:
+    the byte string to hash
+    :return:
+    returns the 64-bit SipHash-2-4 of data
+    """
+    v0 = k0 ^ 0x736f6d6570736575
+    v1 = k1 ^ 0x646f72616e646f6d
+    v2 = k0 ^ 0x6c7967656e657261
+    v3 = k1 ^ 0x7465646279746573
+    length = len(data)
+    tail = length & 7
+    words = list(struct.unpack("<%dQ" % (length >> 3), data[:length - tail]))
+    last = (length & 0xff) << 56
+    for i, byte in enumerate(bytearray(data[length - tail:])):
+        last |= byte << (8 * i)
+    words.append(last)
+    rounds = 2
+    for m in words + [None]:
+        if m is None:
+            v2 ^= 0xff
+            rounds = 4
+        else:
+            v3 ^= m
+        for r in range(rounds):
+            v0 = (v0 + v1) & _HASH_MASK
+            v1 = _rotl(v1, 13) ^ v0
+            v0 = _rotl(v0, 32)
+            v2 = (v2 + v3) & _HASH_MASK
+            v3 = _rotl(v3, 16) ^ v2
+            v0 = (v0 + v3) & _HASH_MASK
+            v3 = _rotl(v3, 21) ^ v0
+            v2 = (v2 + v1) & _HASH_MASK
+            v1 = _rotl(v1, 17) ^ v2
+            v2 = _rotl(v2, 32)
+        if m is not None:
+            v0 ^= m
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+def _key_bytes(item):
+    """
+    :param item:
+     a hashable key
+    :return:
+    returns a byte string for item such that equal keys give equal \
+    strings; keys other than strings and numbers fall back to their \
+    built-in hash
+    """
+    if isinstance(item, unicode):
+        return item.encode("utf-8")
+    if isinstance(item, str):
+        return item
+    if isinstance(item, float) and item.is_integer():
+        item = int(item)
+    if isinstance(item, (int, long)):
+        if -(1 << 63) <= item < (1 << 64):
+            return struct.pack("<Q", item & _HASH_MASK)
+        return str(item)
+    return struct.pack("<q", hash(item))
+
+
+def siphash(seed=None):
+    """A keyed SipHash-2-4 hash function.
+
+    Strings and integers are hashed by content under a secret key,
+    so an attacker who does not know the key can not pick keys that
+    collide, unlike the built-in hash of strings.  Being pure python,
+    a call costs about 30 microseconds, some 40 times the built-in
+    hash, so use it only where keys may be chosen by an attacker.
+
+    :param seed:
+        Derives the 128-bit secret key; None picks one at random.
+
+    :return:
+        A python function that can be passed into the constructor
+        of a hash table to use for hashing objects.
+    """
+    rng = random.Random(seed)
+    k0 = rng.getrandbits(64)
+    k1 = rng.getrandbits(64)
+
+    def hashfunc(item):
+        return _siphash24(k0, k1, _key_bytes(item))
+
+    return hashfunc
+
+
 def terrible_hash(bin):
     """A terrible hash function that can be used for testing.
 
@@ -752,6 +5164,18 @@ def main():
     s = H.display()
     print s
 
+    print "\n------------ CuckooHash operation-----------------\n"
+    C = CuckooHashDict(10, 0.9, lambda x: x % 10, seed=0)
+    C1 = CuckooHashDict(hashfunc=terrible_hash(5), seed=0)
+    for i in range(12):
+        C1[i] = i + 10
+    print C1.display()
+    for i in range(100):
+        C[i] = i + 10
+    del C[21]
+    print "\nLength of cuckoo hash is:", len(C)
+    print "Entries left in the stash:", len(C.stash)
+
     print "\n------------ ChainedHash operation-----------------\n"
     D = ChainedHashDict(10, 0.7, lambda x: x % 10)
     for i in range(100):
@@ -801,6 +5225,30 @@ def main():
     tree = B.items()
     print "Inorder traversal of tree after deleting node 2 is: ", tree
 
+    print "\n--------------B-Tree Operations-----------\n"
+    T = BTreeDict(2)
+    for key, value in ((2, 3), (3, "PQR"), (4, 5), (5, "STL"), (7, "ABC"),
+                       (1, "ASU"), (6, "MNO"), (-2, "XYZ"), (-1, "GHI")):
+        T[key] = value
+    print "Length of B-tree is :", len(T)
+    print "Height of B-tree is:", T.height
+    print "Inorder Tree Traversal: ", T.inorder_keys()
+    print "Preorder Tree Traversal: ", T.preorder_keys()
+    print "Postorder Tree Traversal: ", T.postorder_keys()
+    del T[2]
+    print "After deleting 2 the B-tree is :", T.items()
+
+    print "\n--------------Persistent Tree Operations-----------\n"
+    P = PersistentTreeDict()
+    for key, value in ((2, 3), (3, "PQR"), (1, "ASU"), (5, "STL")):
+        P[key] = value
+    S = P.snapshot()
+    P[4] = 5
+    del P[2]
+    print "Snapshot taken before the updates: ", S.items()
+    print "Tree after inserting 4 and deleting 2: ", P.items()
+    print "Height of persistent tree is:", P.height
+
 
 if __name__ == '__main__':
     import doctest
@@ -0,0 +1,537 @@
+"""Tests for data_structures.
+
+Run with python -m unittest test_data_structures
+"""
+import os
+import pickle
+import random
+import sys
+import tempfile
+import threading
+import unittest
+
+try:
+    import cPickle
+except ImportError:
+    cPickle = pickle
+
+from data_structures import (BLACK, RED, REDUCTIONS, BinarySearchTreeDict,
+                             BTreeDict, CuckooHashDict,
+                             ChainedHashDict, LRUCacheDict,
+                             OpenAddressHashDict, PersistentTreeDict,
+                             SkipListDict, parallel_build)
+
+
+def constant_hash(key):
+    # module level, so worker processes can unpickle it
+    return 7
+
+
+class BinarySearchTreeDictTest(unittest.TestCase):
+    def check_node(self, node, parent, lo, hi, balanced):
+        """returns the black height of the subtree at node"""
+        if node is None:
+            return 1
+        self.assertIs(node.parent, parent)
+        if lo is not None:
+            self.assertLess(lo, node.key)
+        if hi is not None:
+            self.assertLess(node.key, hi)
+        left = self.check_node(node.left, node, lo, node.key, balanced)
+        right = self.check_node(node.right, node, node.key, hi, balanced)
+        sizes = [child.size for child in (node.left, node.right)
+                 if child is not None]
+        self.assertEqual(node.size, 1 + sum(sizes))
+        if not balanced:
+            return 1
+        if node.color == RED:
+            for child in (node.left, node.right):
+                self.assertTrue(child is None or child.color == BLACK)
+        self.assertEqual(left, right)
+        return left + (node.color == BLACK)
+
+    def test_random_updates(self):
+        # every insert and delete keeps the search order, the parent
+        # links, the subtree sizes and, when balanced, the red-black
+        # rules, which delete_fixup has to restore
+        rng = random.Random(1)
+        for balanced in (False, True):
+            tree = BinarySearchTreeDict(balanced=balanced)
+            expected = {}
+            for step in range(2000):
+                key = rng.randrange(300)
+                if key in expected and rng.random() < 0.6:
+                    del tree[key]
+                    del expected[key]
+                else:
+                    tree[key] = step
+                    expected[key] = step
+                self.check_node(tree.root, None, None, None, balanced)
+                if balanced and tree.root is not None:
+                    self.assertEqual(tree.root.color, BLACK)
+                self.assertEqual(len(tree), len(expected))
+            keys = sorted(expected)
+            self.assertEqual([tuple(pair) for pair in tree.items()],
+                             sorted(expected.items()))
+            for i, key in enumerate(keys):
+                self.assertEqual(tree.select(i), key)
+                self.assertEqual(tree.rank(key), i)
+            self.assertRaises(ValueError, tree.__delitem__, 300)
+
+
+class BTreeDictTest(unittest.TestCase):
+    def check_node(self, tree, node, lo, hi, is_root):
+        """returns the depth of the leaves below node"""
+        degree = tree.degree
+        self.assertLessEqual(len(node.keys), 2 * degree - 1)
+        if not is_root:
+            self.assertGreaterEqual(len(node.keys), degree - 1)
+        self.assertEqual(len(node.values), len(node.keys))
+        bounds = [lo] + node.keys + [hi]
+        for i in range(len(bounds) - 1):
+            if bounds[i] is not None and bounds[i + 1] is not None:
+                self.assertLess(bounds[i], bounds[i + 1])
+        if not node.children:
+            return 1
+        self.assertEqual(len(node.children), len(node.keys) + 1)
+        depths = set(self.check_node(tree, child, bounds[i], bounds[i + 1],
+                                     False)
+                     for i, child in enumerate(node.children))
+        self.assertEqual(len(depths), 1)
+        return depths.pop() + 1
+
+    def test_random_updates(self):
+        # small degrees make deletes borrow from and merge siblings
+        # all the time; every node must stay within its key bounds
+        # and every leaf at the same depth
+        rng = random.Random(2)
+        for degree in (2, 3):
+            tree = BTreeDict(degree)
+            expected = {}
+            for step in range(3000):
+                key = rng.randrange(400)
+                if key in expected and rng.random() < 0.6:
+                    del tree[key]
+                    del expected[key]
+                else:
+                    tree[key] = step
+                    expected[key] = step
+                self.check_node(tree, tree.root, None, None, True)
+                self.assertEqual(len(tree), len(expected))
+            self.assertEqual([tuple(pair) for pair in tree.items()],
+                             sorted(expected.items()))
+            for key in list(expected):
+                del tree[key]
+                self.check_node(tree, tree.root, None, None, True)
+            self.assertEqual(len(tree), 0)
+            self.assertEqual(tree.height, 0)
+
+
+def _tree_nodes(node):
+    nodes = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node is not None:
+            nodes.add(id(node))
+            stack.extend((node.left, node.right))
+    return nodes
+
+
+class PersistentTreeDictTest(unittest.TestCase):
+    def check_node(self, node, lo, hi):
+        if node is None:
+            return
+        if lo is not None:
+            self.assertLess(lo, node.key)
+        if hi is not None:
+            self.assertLess(node.key, hi)
+        self.check_node(node.left, lo, node.key)
+        self.check_node(node.right, node.key, hi)
+        heights = [0 if child is None else child.height
+                   for child in (node.left, node.right)]
+        self.assertLessEqual(abs(heights[0] - heights[1]), 1)
+        self.assertEqual(node.height, 1 + max(heights))
+        self.assertEqual(node.size, 1 + sum(
+            child.size for child in (node.left, node.right)
+            if child is not None))
+
+    def test_random_updates(self):
+        # every version stays an AVL tree, the older versions kept as
+        # snapshots never change, and an update copies only O(log n)
+        # nodes, sharing the rest with the version before it
+        rng = random.Random(3)
+        tree = PersistentTreeDict()
+        expected = {}
+        versions = []
+        for step in range(2000):
+            key = rng.randrange(300)
+            before = tree.snapshot()
+            if key in expected and rng.random() < 0.6:
+                del tree[key]
+                del expected[key]
+            else:
+                tree[key] = step
+                expected[key] = step
+            self.check_node(tree.root, None, None)
+            self.assertEqual(len(tree), len(expected))
+            copied = _tree_nodes(tree.root) - _tree_nodes(before.root)
+            self.assertLessEqual(len(copied), 3 * (before.height + 1))
+            if step % 100 == 0:
+                versions.append((tree.snapshot(), sorted(expected.items())))
+        for version, items in versions:
+            self.assertEqual([tuple(pair) for pair in version.items()],
+                             items)
+        self.assertRaises(ValueError, tree.__delitem__, 300)
+
+
+class SkipListDictTest(unittest.TestCase):
+    def test_concurrent_readers(self):
+        # lock-free readers race a writer that keeps appending and
+        # deleting keys past the end of the list, the case where a
+        # reader's stop node is unlinked below it mid-walk
+        skip = SkipListDict(seed=3)
+        for i in range(0, 64, 2):
+            skip[i] = i
+        done = []
+        errors = []
+
+        def reader():
+            try:
+                while not done:
+                    for k in range(0, 64, 2):
+                        node = skip.find_node(k)
+                        if node is None or node.value != k:
+                            errors.append("lost key %d" % k)
+                    for k in range(63, 80):
+                        skip.find_node(k)
+                    keys = [key for key, value in skip.range(60)]
+                    if keys != sorted(set(keys)):
+                        errors.append("unsorted range %r" % keys)
+            except Exception as e:
+                errors.append(repr(e))
+
+        interval = sys.getcheckinterval()
+        sys.setcheckinterval(1)
+        try:
+            threads = [threading.Thread(target=reader) for i in range(3)]
+            for thread in threads:
+                thread.start()
+            for rep in range(2000):
+                for i in range(64, 80):
+                    skip[i] = i
+                for i in range(79, 63, -1):
+                    del skip[i]
+        finally:
+            done.append(True)
+            for thread in threads:
+                thread.join()
+            sys.setcheckinterval(interval)
+        self.assertEqual(errors, [])
+        self.assertEqual(list(skip), list(range(0, 64, 2)))
+
+
+class ChainedHashDictTest(unittest.TestCase):
+    def test_pickle_long_chain(self):
+        # a single 5000-node chain, past the recursion limit of both
+        # picklers if the nodes were pickled
+        table = ChainedHashDict(hashfunc=constant_hash, incremental=True)
+        for i in range(5000):
+            table[i] = str(i)
+        for module in (pickle, cPickle):
+            for protocol in (0, 2):
+                copy = module.loads(module.dumps(table, protocol))
+                self.assertEqual(sorted(copy.iteritems()),
+                                 sorted(table.iteritems()))
+                self.assertTrue(copy.incremental)
+
+    def test_incremental_mixed_updates(self):
+        # inserts, overwrites and deletes keep landing while the table
+        # is halfway through moving its bins, and every key has to be
+        # found in whichever array currently holds it
+        rng = random.Random(4)
+        for migrate_step in (1, 4):
+            table = ChainedHashDict(bin_count=2, incremental=True,
+                                    migrate_step=migrate_step)
+            expected = {}
+            migrating = 0
+            for step in range(6000):
+                key = rng.randrange(2000)
+                if key in expected and rng.random() < 0.4:
+                    del table[key]
+                    del expected[key]
+                else:
+                    table[key] = step
+                    expected[key] = step
+                if table._old_slot is not None:
+                    migrating += 1
+                    self.assertTrue(table.stats()["migrating"])
+                if step % 50 == 0:
+                    self.assertEqual(sorted(table.iteritems()),
+                                     sorted(expected.items()))
+                    for key in range(2000):
+                        self.assertEqual(table.get(key), expected.get(key))
+                self.assertEqual(len(table), len(expected))
+            self.assertTrue(migrating)
+            self.assertEqual(sorted(table.iteritems()),
+                             sorted(expected.items()))
+
+    def test_incremental_bloom_rebuild(self):
+        # an incremental table rebuilds its filter a few bins per write
+        # once deletes leave it mostly stale, instead of in one delete
+        table = ChainedHashDict(incremental=True, bloom=True)
+        for i in range(4000):
+            table[i] = i
+        started = 0
+        for i in range(3000):
+            del table[i]
+            if table._next_bloom is not None:
+                self.assertLessEqual(table._bloom_scanned,
+                                     table.migrate_step * (i + 1))
+                started += 1
+        self.assertTrue(started)
+        end = 4000 + table._bin_count // 2
+        deleted = set(range(3000))
+        for i in range(4000, end):
+            table[i] = i
+            if i % 3 == 0:
+                # deletes behind and ahead of the scan
+                del table[i - 1000]
+                deleted.add(i - 1000)
+            # a swapped-in filter counts exactly the live keys
+            bloom = table._bloom
+            if table._next_bloom is None:
+                self.assertEqual(bloom.count - bloom.stale, len(table))
+        self.assertIsNone(table._next_bloom)
+        self.assertFalse(table._bloom.needs_rebuild)
+        for i in range(end):
+            self.assertEqual(table.find_node(i) is not None,
+                             i not in deleted)
+
+
+class CuckooHashDictTest(unittest.TestCase):
+    def check_homes(self, table):
+        # every entry sits in one of its two buckets or in the stash
+        size = CuckooHashDict.BUCKET_SIZE
+        for pos, key in enumerate(table.hash_slot):
+            if key is not None:
+                first, second = table._buckets(table._hashes[pos])
+                self.assertTrue(first <= pos < first + size or
+                                second <= pos < second + size)
+        self.assertEqual(len(table), len(table.stash) + sum(
+            1 for key in table.hash_slot if key is not None))
+
+    def test_stash_and_reseed(self):
+        # with no kicks allowed, displaced keys pile into the stash
+        # until the table reseeds; every key must survive the reseeds
+        rng = random.Random(5)
+        table = CuckooHashDict(max_kicks=0, max_load=0.95, seed=5)
+        expected = {}
+        seeds = set([table._mixes])
+        stashed = 0
+        for step in range(4000):
+            key = rng.randrange(1500)
+            if key in expected and rng.random() < 0.4:
+                del table[key]
+                del expected[key]
+            else:
+                table[key] = step
+                expected[key] = step
+            seeds.add(table._mixes)
+            stashed = max(stashed, len(table.stash))
+            self.assertEqual(len(table), len(expected))
+            if step % 100 == 0:
+                self.check_homes(table)
+        self.check_homes(table)
+        self.assertTrue(stashed)
+        self.assertGreater(table._rehashes, 0)
+        self.assertGreater(len(seeds), table._rehashes)
+        for key in range(1500):
+            if key in expected:
+                self.assertEqual(table[key], expected[key])
+            else:
+                self.assertRaises(ValueError, table.__getitem__, key)
+
+    def test_colliding_hash(self):
+        # reseeding can not split keys that share one hash: they stay
+        # in an overfull stash, which still answers every lookup
+        table = CuckooHashDict(hashfunc=constant_hash, seed=1)
+        for i in range(40):
+            table[i] = -i
+        self.assertEqual(len(table.stash), 40 - 2 * table.BUCKET_SIZE)
+        for i in range(0, 40, 2):
+            del table[i]
+        self.assertEqual(len(table), 20)
+        for i in range(1, 40, 2):
+            self.assertEqual(table[i], -i)
+        for i in range(0, 40, 2):
+            self.assertRaises(ValueError, table.__getitem__, i)
+        self.check_homes(table)
+
+
+class LRUCacheDictTest(unittest.TestCase):
+    def test_eviction_order(self):
+        # a list kept most recently used first models the cache
+        rng = random.Random(6)
+        evicted = []
+        cache = LRUCacheDict(capacity=8, on_evict=lambda key, value:
+                             evicted.append(key))
+        order = []
+        expected_evicted = []
+        for step in range(3000):
+            key = rng.randrange(20)
+            if rng.random() < 0.5:
+                value = cache.get(key)
+                if key in order:
+                    self.assertEqual(value, key * 10)
+                    order.remove(key)
+                    order.insert(0, key)
+                else:
+                    self.assertIsNone(value)
+            else:
+                cache[key] = key * 10
+                if key in order:
+                    order.remove(key)
+                order.insert(0, key)
+                while len(order) > 8:
+                    expected_evicted.append(order.pop())
+            self.assertEqual(list(cache), order)
+            self.assertEqual(evicted, expected_evicted)
+        stats = cache.stats()
+        self.assertEqual(stats["evictions"], len(evicted))
+        self.assertEqual(stats["entries"], len(order))
+
+    def test_ttl_expiry(self):
+        now = [0.0]
+        expired = []
+        cache = LRUCacheDict(capacity=10, ttl=10, clock=lambda: now[0],
+                             on_evict=lambda key, value:
+                             expired.append((key, value)))
+        cache["a"] = 1
+        cache.put("b", 2, ttl=30)
+        cache["c"] = 3
+        now[0] = 9.5
+        self.assertEqual(cache.get("a"), 1)
+        now[0] = 10.0
+        # an entry expires at its deadline, found stale by a lookup
+        self.assertIsNone(cache.get("a"))
+        self.assertRaises(ValueError, cache.__contains__, "c")
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(expired, [("a", 1)])
+        self.assertEqual(cache.stats()["expirations"], 1)
+        # a put restarts the entry's ttl
+        cache.put("b", 4)
+        now[0] = 19.0
+        self.assertEqual(cache["b"], 4)
+        now[0] = 20.0
+        self.assertRaises(ValueError, cache.__getitem__, "b")
+        self.assertEqual(expired, [("a", 1), ("b", 4)])
+        self.assertEqual(cache.stats()["expirations"], 2)
+
+    def test_weigher(self):
+        evicted = []
+        cache = LRUCacheDict(capacity=10, weigher=lambda key, value:
+                             len(value), on_evict=lambda key, value:
+                             evicted.append(key))
+        cache["a"] = "xxxx"
+        cache["b"] = "xxxx"
+        cache.get("a")
+        cache["c"] = "xxx"
+        self.assertEqual(evicted, ["b"])
+        self.assertEqual(list(cache), ["c", "a"])
+        self.assertEqual(cache.weight, 7)
+        self.assertRaises(ValueError, cache.put, "d", "x" * 11)
+
+
+class OpenAddressHashDictTest(unittest.TestCase):
+    def test_full_load_misses_end(self):
+        # max_load=1 must still leave an empty slot to end probes on
+        for robin_hood in (False, True):
+            table = OpenAddressHashDict(bin_count=8, max_load=1.0,
+                                        robin_hood=robin_hood)
+            for i in range(8):
+                table[i] = i
+            self.assertIn(None, table.hash_slot)
+            self.assertFalse(table.contains(100))
+            self.assertEqual(table.get(7), 7)
+
+    def test_save_round_trip(self):
+        # the mapped file answers like the table it was saved from,
+        # for every reduction and probing scheme, after deletes
+        keys = list(range(-200, 300, 3)) + ["key %d" % i for i in range(50)]
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            for reduce in REDUCTIONS:
+                for robin_hood in (False, True):
+                    table = OpenAddressHashDict(reduce=reduce,
+                                                robin_hood=robin_hood)
+                    for key in keys:
+                        table[key] = [key]
+                    for key in keys[::4]:
+                        del table[key]
+                    table.save(path)
+                    with OpenAddressHashDict.open_mmap(path) as mapped:
+                        self.assertEqual(len(mapped), len(table))
+                        self.assertEqual(sorted(mapped), sorted(table))
+                        for key in table:
+                            self.assertEqual(mapped[key], [key])
+                        for key in keys[::4] + [1000, "missing"]:
+                            self.assertRaises(ValueError,
+                                              mapped.__getitem__, key)
+            with open(path, "wb") as f:
+                f.write(b"not a table" * 10)
+            self.assertRaises(ValueError, OpenAddressHashDict.open_mmap,
+                              path)
+        finally:
+            os.remove(path)
+
+
+class ParallelBuildTest(unittest.TestCase):
+    def test_long_chains_cross_processes(self):
+        # one partition gets every entry as a single 2000-long chain or
+        # probe cluster, more than pickling linked nodes can recurse
+        pairs = [(i, -i) for i in range(2000)] + [(5, "last")]
+        expected = dict(pairs)
+        for table_class, options in ((ChainedHashDict, {}),
+                                     (OpenAddressHashDict, {}),
+                                     (OpenAddressHashDict,
+                                      {"robin_hood": True})):
+            for sharded in (False, True):
+                table = parallel_build(iter(pairs), table_class,
+                                       processes=2, partitions=4,
+                                       sharded=sharded,
+                                       hashfunc=constant_hash, **options)
+                self.assertEqual(len(table), len(expected))
+                for key, value in expected.items():
+                    self.assertEqual(table[key], value)
+
+    def test_count_too_small(self):
+        # a mask-reduced table sized from a low count has to grow
+        # rather than fill up
+        pairs = [(i, -i) for i in range(30)]
+        for robin_hood in (False, True):
+            for sharded in (False, True):
+                table = parallel_build(iter(pairs), OpenAddressHashDict,
+                                       processes=1, partitions=2,
+                                       sharded=sharded, reduce="mask",
+                                       count=5, robin_hood=robin_hood)
+                self.assertEqual(len(table), len(pairs))
+                for key, value in pairs:
+                    self.assertEqual(table[key], value)
+
+    def test_mapping_input(self):
+        pairs = [(i, -i) for i in range(30)]
+        chained = ChainedHashDict()
+        cache = LRUCacheDict()
+        for key, value in pairs:
+            chained[key] = value
+            cache[key] = value
+        for mapping in (dict(pairs), chained, cache):
+            table = parallel_build(mapping, OpenAddressHashDict,
+                                   processes=1, partitions=2)
+            self.assertEqual(sorted(table.iteritems()), pairs)
+
+
+if __name__ == '__main__':
+    unittest.main()